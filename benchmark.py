@@ -0,0 +1,347 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Benchmarks for the add-ons on synthetic timelines
+#
+# Run headless with:
+#   blender -b --python benchmark.py -- [output.json]
+
+# Import modules
+import bpy
+import sys
+import json
+import time
+import tempfile
+from os import path
+
+# Import add-ons from this directory
+sys.path.insert(0, path.dirname(path.abspath(__file__)))
+import composite
+import text
+import transform
+
+# Constants
+REPEAT = 5
+STRIP_COUNTS = [100, 1000, 5000]
+META_DEPTHS = [1, 10, 50]
+QUAD_COUNTS = [100, 1000]
+
+# Timeline sizes, varied one at a time around the base size
+BASE_SIZE = {'strips': 100, 'metas': 1, 'images': 10, 'screens': 5}
+SIZES = {
+    'strips': [10, 100, 1000, 5000],
+    'metas': [1, 10, 50],
+    'images': [10, 1000, 5000],
+    'screens': [5, 50],
+}
+
+### Helper functions ###
+########################
+
+# Get sequencer context override
+def sequencer_override(scene, region_type='WINDOW'):
+    # Turn first area into sequence editor
+    window = bpy.context.window_manager.windows[0]
+    area = window.screen.areas[0]
+    area.type = 'SEQUENCE_EDITOR'
+    area.spaces[0].view_type = 'SEQUENCER_PREVIEW'
+
+    # Find region
+    region = None
+    for area_region in area.regions:
+        if area_region.type == region_type:
+            region = area_region
+
+    # Return override
+    return {
+        'window': window,
+        'screen': window.screen,
+        'area': area,
+        'region': region,
+        'space_data': area.spaces[0],
+        'scene': scene,
+    }
+
+# Create source image file
+def create_image_file(directory):
+    image = bpy.data.images.new("Source", 64, 36)
+    image.filepath_raw = path.join(directory, "source.png")
+    image.file_format = 'PNG'
+    image.save()
+    bpy.data.images.remove(image)
+    return path.join(directory, "source.png")
+
+# Create scene with synthetic timeline
+def create_timeline(strip_count, meta_depth, name="Benchmark",
+                    image_path=None):
+    scene = bpy.data.scenes.new(name)
+    se = scene.sequence_editor_create()
+    override = sequencer_override(scene)
+
+    # Add color or image strips spread over channels
+    per_meta = max(1, strip_count // meta_depth)
+    for i in range(strip_count):
+        channel = 1 + i % 8
+        frame_start = 1 + (i // 8) * 10
+        if image_path is None:
+            se.sequences.new_effect(
+                "Strip%d" % i, 'COLOR', channel,
+                frame_start=frame_start, frame_end=frame_start + 10
+            )
+        else:
+            se.sequences.new_image(
+                "Strip%d" % i, image_path, channel, frame_start
+            ).frame_final_duration = 10
+
+        # Nest everything so far into a new meta strip
+        if (i + 1) % per_meta == 0 and i + 1 < strip_count:
+            for seq in se.sequences:
+                seq.select = True
+            bpy.ops.sequencer.meta_make(override)
+
+    return scene
+
+# Fill image and screen datablocks up to count
+def create_datablocks(image_count, screen_count, scene):
+    for i in range(image_count - len(bpy.data.images)):
+        bpy.data.images.new("Image%d" % i, 4, 4)
+
+    override = sequencer_override(scene)
+    for i in range(screen_count - len(bpy.data.screens)):
+        bpy.ops.screen.new(override)
+
+# Select strips at top level
+def select_strips(scene, count):
+    for seq in scene.sequence_editor.sequences:
+        seq.select = False
+    strips = [seq for seq in scene.sequence_editor.sequences
+        if seq.type == 'IMAGE'][-count:]
+    for seq in strips:
+        seq.select = True
+    scene.sequence_editor.active_strip = strips[-1]
+
+# Time function in seconds per call
+def measure(function, repeat=REPEAT):
+    start = time.perf_counter()
+    for i in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+# Time function in seconds per call, reopening file before each call
+def measure_fresh(function, filepath, prepare, repeat=REPEAT):
+    seconds = 0
+    for i in range(repeat):
+        # Reset data created by previous calls
+        bpy.ops.wm.open_mainfile(filepath=filepath)
+        argument = prepare()
+
+        # Time call only
+        start = time.perf_counter()
+        function(argument)
+        seconds += time.perf_counter() - start
+    return seconds / repeat
+
+# Find containing sequence list by depth first search
+def search_sequence_list(scene, strip):
+    sequenceLists = [scene.sequence_editor.sequences]
+    while len(sequenceLists) != 0:
+        seqList = sequenceLists.pop()
+        for seq in seqList:
+            if seq == strip:
+                return seqList
+            elif seq.type == 'META':
+                sequenceLists.append(seq.sequences)
+
+### Benchmarks ###
+##################
+
+# Containing sequence list lookup
+def benchmark_sequence_list():
+    results = []
+    for strip_count in STRIP_COUNTS:
+        for meta_depth in META_DEPTHS:
+            scene = create_timeline(strip_count, meta_depth)
+            strips = list(scene.sequence_editor.sequences_all)[:100]
+
+            # Time searching and cached lookups
+            composite.clear_caches()
+            build = measure(lambda: composite.build_parent_map(scene))
+            composite.get_sequence_list(scene, strips[0])
+            results.append({
+                'strips': strip_count,
+                'metas': meta_depth,
+                'search': measure(lambda: [
+                    search_sequence_list(scene, s) for s in strips
+                ]) / len(strips),
+                'build': build,
+                'lookup': measure(lambda: [
+                    composite.get_sequence_list(scene, s) for s in strips
+                ]) / len(strips),
+            })
+
+            # Remove scene
+            bpy.data.scenes.remove(scene)
+
+    return results
+
+# Operator calls as (operator id, region, selected strips, call)
+OPERATORS = [
+    ('sf_addons.composite_effect_add', 'WINDOW', 2,
+        lambda o: bpy.ops.sf_addons.composite_effect_add(o, 'INVOKE_DEFAULT')),
+    ('sf_addons.keying_effect_add', 'WINDOW', 1,
+        lambda o: bpy.ops.sf_addons.keying_effect_add(o, 'INVOKE_DEFAULT')),
+    ('sf_addons.pixelize_effect_add', 'WINDOW', 1,
+        lambda o: bpy.ops.sf_addons.pixelize_effect_add(o, 'INVOKE_DEFAULT')),
+    ('sf_addons.transform_3d_effect_add', 'WINDOW', 2,
+        lambda o: bpy.ops.sf_addons.transform_3d_effect_add(
+            o, 'INVOKE_DEFAULT'
+        )),
+    ('sf_addons.text_scene_effect_add', 'WINDOW', 0,
+        lambda o: bpy.ops.sf_addons.text_scene_effect_add(o, 'EXEC_DEFAULT')),
+    ('sequencer.tf_add_transform', 'WINDOW', 1,
+        lambda o: bpy.ops.sequencer.tf_add_transform(o)),
+    ('sequencer.tf_select', 'PREVIEW', 0,
+        lambda o: bpy.ops.sequencer.tf_select(o, 'INVOKE_DEFAULT')),
+    ('sequencer.tf_insert_keyframe', 'WINDOW', 0,
+        lambda o: bpy.ops.sequencer.tf_insert_keyframe(o, ch=(1, 1, 1, 1, 1))),
+]
+
+# Get operator function from operator id
+def get_operator(idname):
+    category, name = idname.split(".")
+    return getattr(getattr(bpy.ops, category), name)
+
+# Operator latency over timeline sizes
+def benchmark_operators(image_path):
+    results = []
+    snapshot = path.join(tempfile.mkdtemp(), "timeline.blend")
+
+    # Vary one size at a time
+    for dimension, values in sorted(SIZES.items()):
+        for value in values:
+            size = dict(BASE_SIZE)
+            size[dimension] = value
+
+            # Create timeline
+            scene = create_timeline(
+                size['strips'], size['metas'], image_path=image_path
+            )
+            create_datablocks(size['images'], size['screens'], scene)
+            scene_name = scene.name
+
+            # Save timeline so every call starts from the same file
+            bpy.ops.wm.save_as_mainfile(filepath=snapshot, copy=True)
+
+            # Time operators
+            for name, region_type, selected, call in OPERATORS:
+                result = dict(size, operator=name)
+
+                # Get override and selection of reopened timeline
+                def prepare():
+                    scene = bpy.data.scenes[scene_name]
+                    if selected != 0:
+                        select_strips(scene, selected)
+                    return sequencer_override(scene, region_type)
+
+                # Skip operators that can't run in this context
+                try:
+                    bpy.ops.wm.open_mainfile(filepath=snapshot)
+                    if not get_operator(name).poll(prepare()):
+                        print("Skipping %s: poll failed" % name)
+                        result['skipped'] = "poll failed"
+                        results.append(result)
+                        continue
+                    result['seconds'] = measure_fresh(call, snapshot, prepare)
+                except Exception as error:
+                    result['error'] = "%s: %s" % (type(error).__name__, error)
+                    print("Benchmarking %s failed: %s" % (
+                        name, result['error']
+                    ))
+                results.append(result)
+
+            # Remove scene
+            bpy.ops.wm.open_mainfile(filepath=snapshot)
+            bpy.data.scenes.remove(bpy.data.scenes[scene_name])
+
+    return results
+
+# Transform strip quads, per strip and batched
+def benchmark_quads():
+    results = []
+    for strip_count in QUAD_COUNTS:
+        scene = create_timeline(strip_count, 1)
+
+        # Add transformed strips
+        sequences = scene.sequence_editor.sequences
+        strips = []
+        for i, seq in enumerate(list(sequences)):
+            strip = sequences.new_effect(
+                "Transform%d" % i, 'TRANSFORM', seq.channel + 8,
+                seq.frame_final_start, seq1=seq
+            )
+            strip.rotation_start = i % 360
+            strip.scale_start_x = strip.scale_start_y = 0.5
+            strips.append(strip)
+
+        # Time quad computation
+        results.append({
+            'strips': strip_count,
+            'numpy': transform.numpy is not None,
+            'make_quad': measure(
+                lambda: [transform.make_quad(s) for s in strips]
+            ),
+            'make_quads': measure(lambda: transform.make_quads(strips)),
+        })
+
+        # Remove scene
+        bpy.data.scenes.remove(scene)
+
+    return results
+
+### Main ###
+############
+
+# Run benchmarks
+def main():
+    # Register add-ons
+    for module in (composite, text, transform):
+        try:
+            module.register()
+        except Exception as error:
+            print("Registering %s failed: %s" % (module.__name__, error))
+
+    # Run benchmarks
+    image_path = create_image_file(tempfile.mkdtemp())
+    results = {
+        'blender': bpy.app.version_string,
+        'sequence_list': benchmark_sequence_list(),
+        'operators': benchmark_operators(image_path),
+        'quads': benchmark_quads(),
+    }
+
+    # Write results
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if len(argv) > 0:
+        with open(argv[0], 'w') as output:
+            json.dump(results, output, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+# Run if executed as script
+if __name__ == '__main__':
+    main()
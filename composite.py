@@ -31,14 +31,22 @@ bl_info = {
 
 # Constants
 MAX_CHANNEL = 32
+PRERENDER_DIR = "//renders/composite"
+PRESET_DIR = "presets/sf_composite"
 
 # Import modules
 import bpy
+import os
 from os import path
 import re
 import math
+import json
+import hashlib
 from functools import reduce
+from bisect import bisect_right
 from mathutils import Vector
+from bpy.app.handlers import persistent
+from scenetools import CREATED_BY, tag_created
 
 ### Helper functions ###
 ########################
@@ -52,18 +60,229 @@ def switch_screen(context, screen_name):
         # Switch to next screen
         bpy.ops.screen.screen_set(delta=1)
 
-# Get containing sequence list
-def get_sequence_list(scene, strip):
-    sequenceLists = [scene.sequence_editor.sequences]
+# Meta strip name paths of containing sequence lists by strip name per scene
+parent_maps = {}
+
+# Build map from strip names to meta strip name paths
+def build_parent_map(scene):
+    parent_map = {}
+    sequenceLists = [(scene.sequence_editor.sequences, ())]
 
-    # Search depth first for sequence list
+    # Walk all nested meta strips once
     while len(sequenceLists) != 0:
-        seqList = sequenceLists.pop()
+        seqList, meta_path = sequenceLists.pop()
         for seq in seqList:
-            if seq == strip:
-                return seqList
-            elif seq.type == 'META':
-                sequenceLists.append(seq.sequences)
+            parent_map[seq.name] = meta_path
+            if seq.type == 'META':
+                sequenceLists.append((seq.sequences, meta_path + (seq.name,)))
+
+    return parent_map
+
+# Resolve meta strip name path to sequence list
+def resolve_sequence_list(scene, meta_path):
+    seqList = scene.sequence_editor.sequences
+    for name in meta_path:
+        meta = seqList.get(name)
+        if meta is None or meta.type != 'META':
+            return None
+        seqList = meta.sequences
+    return seqList
+
+# Get meta strip name path of strip
+def get_meta_path(scene, strip):
+    # Look up cached path, resolved from the current strips
+    parent_map = parent_maps.get(scene.name)
+    if parent_map is not None and strip.name in parent_map:
+        meta_path = parent_map[strip.name]
+        seqList = resolve_sequence_list(scene, meta_path)
+        if seqList is not None and seqList.get(strip.name) == strip:
+            return meta_path
+
+    # Rebuild map if missing or outdated
+    parent_map = parent_maps[scene.name] = build_parent_map(scene)
+    return parent_map.get(strip.name)
+
+# Get containing sequence list
+def get_sequence_list(scene, strip):
+    meta_path = get_meta_path(scene, strip)
+    if meta_path is None:
+        return None
+    return resolve_sequence_list(scene, meta_path)
+
+# Add new strip to parent map if mapped
+def add_to_parent_map(scene, strip, meta_path=()):
+    parent_map = parent_maps.get(scene.name)
+    if parent_map is not None:
+        parent_map[strip.name] = meta_path
+
+### Channel index ###
+#####################
+
+# Per channel interval index of a sequence list
+class ChannelIndex():
+    # Build index
+    def __init__(self, sequences):
+        # Collect strip intervals per channel
+        intervals = [[] for i in range(MAX_CHANNEL + 1)]
+        for seq in sequences:
+            intervals[seq.channel].append(
+                (seq.frame_final_start, seq.frame_final_end)
+            )
+
+        # Store start and end frames sorted by start frame
+        self.starts = []
+        self.ends = []
+        for channel_intervals in intervals:
+            channel_intervals.sort()
+            self.starts.append([start for start, end in channel_intervals])
+            self.ends.append([end for start, end in channel_intervals])
+
+    # Add strip interval
+    def add(self, channel, start, end):
+        index = bisect_right(self.starts[channel], start)
+        self.starts[channel].insert(index, start)
+        self.ends[channel].insert(index, end)
+
+    # Check if channel is free within frames
+    def is_free(self, channel, start, end):
+        # Strips of one channel don't overlap, so the last strip starting
+        # before the end frame is the only possible conflict
+        index = bisect_right(self.starts[channel], end) - 1
+        return index < 0 or self.ends[channel][index] < start
+
+    # Find first free channel counting up from first channel
+    def find_free_channel(self, start, end, first_channel, stop_channel):
+        channel = first_channel
+        while channel != stop_channel:
+            # Stop search if free
+            if self.is_free(channel, start, end):
+                return channel
+
+            # Count up on conflict
+            channel = (channel % MAX_CHANNEL) + 1
+
+        # No fitting channel
+        return None
+
+# Get channel index of sequence list from indices of one operator call
+def get_channel_index(channel_indices, sequences):
+    key = sequences.path_from_id()
+    if key not in channel_indices:
+        channel_indices[key] = ChannelIndex(sequences)
+    return channel_indices[key]
+
+### Datablock registries ###
+############################
+
+# Normalize file path for comparison
+def normalize_path(filepath):
+    return path.normcase(path.normpath(bpy.path.abspath(filepath)))
+
+# Lazily built datablock index
+class DatablockRegistry():
+    # Initialize registry
+    def __init__(self, get_collection, get_key):
+        self.get_collection = get_collection
+        self.get_key = get_key
+        self.clear()
+
+    # Clear registry
+    def clear(self):
+        self.datablocks = None
+        self.length = 0
+
+    # Build registry
+    def build(self):
+        collection = self.get_collection()
+        self.datablocks = {}
+        for datablock in collection:
+            self.datablocks.setdefault(self.get_key(datablock), datablock)
+        self.length = len(collection)
+
+    # Find datablock by key
+    def find(self, key):
+        # Rebuild if missing or datablocks were added or removed
+        if self.datablocks is None \
+        or self.length != len(self.get_collection()):
+            self.build()
+
+        # Validate found datablock
+        datablock = self.datablocks.get(key)
+        if datablock is not None:
+            try:
+                if self.get_key(datablock) == key:
+                    return datablock
+            except ReferenceError: pass
+
+            # Rebuild on stale entry
+            self.build()
+            datablock = self.datablocks.get(key)
+
+        return datablock
+
+    # Add new datablock
+    def add(self, datablock):
+        if self.datablocks is not None:
+            self.datablocks.setdefault(self.get_key(datablock), datablock)
+            self.length += 1
+
+# Images by file path and source
+image_registry = DatablockRegistry(
+    lambda: bpy.data.images,
+    lambda img: (normalize_path(img.filepath), img.source)
+)
+
+# Movie clips by file path
+clip_registry = DatablockRegistry(
+    lambda: bpy.data.movieclips,
+    lambda clip: normalize_path(clip.filepath)
+)
+
+# Get image for file, load if not found
+def get_image(image_path, image_source):
+    # Find image
+    image = image_registry.find((normalize_path(image_path), image_source))
+
+    # Load image if not found
+    if image is None:
+        try:
+            image = bpy.data.images.load(image_path)
+            image.source = image_source
+            tag_created(image, __name__)
+            image_registry.add(image)
+        except: pass
+
+    return image
+
+# Get movie clip for file, load if not found
+def get_clip(clip_path):
+    # Find clip
+    clip = clip_registry.find(normalize_path(clip_path))
+
+    # Load clip if not found
+    if clip is None:
+        clip = bpy.data.movieclips.load(clip_path)
+        tag_created(clip, __name__)
+        clip_registry.add(clip)
+
+    return clip
+
+### Cache invalidation ###
+##########################
+
+# Clear all caches
+@persistent
+def clear_caches(*args):
+    parent_maps.clear()
+    channel_indices.clear()
+    image_registry.clear()
+    clip_registry.clear()
+
+# Clear caches of updated scene
+@persistent
+def update_caches(scene):
+    if scene.is_updated:
+        parent_maps.pop(scene.name, None)
 
 ### RegExp preparation ###
 ##########################
@@ -90,6 +309,257 @@ class SceneCompositeProps(bpy.types.PropertyGroup):
     # Mask screen property
     mask_screen = bpy.props.EnumProperty(name="Mask screen", items=get_screens)
 
+### Node presets ###
+####################
+
+# Built in composite presets
+composite_presets = {
+    'Composite': {
+        'offset': [0, 640],
+        'nodes': [
+            {'name': 'composite', 'type': 'CompositorNodeComposite',
+                'location': [180, 0]},
+            {'name': 'viewer', 'type': 'CompositorNodeViewer',
+                'location': [180, -160]},
+        ],
+        'links': [
+            ['scale', 'Image', 'composite', 'Image'],
+            ['scale', 'Image', 'viewer', 'Image'],
+        ],
+    },
+    'Keying': {
+        'single_strip': True,
+        'offset': [-160, 520],
+        'nodes': [
+            {'name': 'mask', 'type': 'CompositorNodeMask',
+                'location': [-180, -360]},
+            {'name': 'invert', 'type': 'CompositorNodeInvert',
+                'location': [0, -360]},
+            {'name': 'keying', 'type': 'CompositorNodeKeying',
+                'location': [180, 0]},
+            {'name': 'alpha', 'type': 'CompositorNodePremulKey',
+                'location': [360, 0]},
+            {'name': 'composite', 'type': 'CompositorNodeComposite',
+                'location': [540, 0]},
+            {'name': 'viewer', 'type': 'CompositorNodeViewer',
+                'location': [540, -160]},
+        ],
+        'links': [
+            ['mask', 'Mask', 'invert', 'Color'],
+            ['scale', 'Image', 'keying', 'Image'],
+            ['keying', 'Image', 'alpha', 'Image'],
+            ['alpha', 'Image', 'composite', 'Image'],
+            ['alpha', 'Image', 'viewer', 'Image'],
+        ],
+    },
+    'Pixelize': {
+        'single_strip': True,
+        'offset': [-160, 260],
+        'groups': {
+            'Pixelize': {
+                'offset': [-60, 80],
+                'nodes': [
+                    {'name': 'input', 'type': 'NodeGroupInput',
+                        'location': [0, 0]},
+                    {'name': 'divide', 'type': 'CompositorNodeMath',
+                        'location': [180, -140], 'settings': {
+                            'operation': 'DIVIDE',
+                            'inputs[0].default_value': 1.0,
+                        }},
+                    {'name': 'scale_down', 'type': 'CompositorNodeScale',
+                        'location': [360, -40]},
+                    {'name': 'pixelate', 'type': 'CompositorNodePixelate',
+                        'location': [540, -40]},
+                    {'name': 'scale_up', 'type': 'CompositorNodeScale',
+                        'location': [720, 160]},
+                    {'name': 'output', 'type': 'NodeGroupOutput',
+                        'location': [900, 0]},
+                ],
+                'links': [
+                    ['input', 0, 'scale_down', 'Image'],
+                    ['input', 1, 'divide', 1],
+                    ['divide', 'Value', 'scale_down', 'X'],
+                    ['divide', 'Value', 'scale_down', 'Y'],
+                    ['scale_down', 'Image', 'pixelate', 'Color'],
+                    ['pixelate', 'Color', 'scale_up', 'Image'],
+                    ['input', 'Value', 'scale_up', 'X'],
+                    ['input', 'Value', 'scale_up', 'Y'],
+                    ['scale_up', 'Image', 'output', 0],
+                ],
+            },
+        },
+        'nodes': [
+            {'name': 'size', 'type': 'CompositorNodeMath',
+                'location': [-180, 180], 'settings': {
+                    'name': 'Size', 'label': 'Size',
+                    'operation': 'MULTIPLY',
+                    'inputs[0].default_value': 0.305,
+                }},
+            {'name': 'mask', 'type': 'CompositorNodeMask',
+                'location': [-180, 400]},
+            {'name': 'pixelize_movie', 'type': 'CompositorNodeGroup',
+                'location': [180, 80], 'group': 'Pixelize'},
+            {'name': 'pixelize_mask', 'type': 'CompositorNodeGroup',
+                'location': [180, 240], 'group': 'Pixelize'},
+            {'name': 'mix', 'type': 'CompositorNodeMixRGB',
+                'location': [360, 200], 'settings': {'use_alpha': True}},
+            {'name': 'composite', 'type': 'CompositorNodeComposite',
+                'location': [540, 200]},
+            {'name': 'viewer', 'type': 'CompositorNodeViewer',
+                'location': [540, 40]},
+        ],
+        'links': [
+            ['scale', 'Image', 'pixelize_movie', 'Image'],
+            ['size', 'Value', 'pixelize_movie', 'Value'],
+            ['mask', 'Mask', 'pixelize_mask', 'Image'],
+            ['size', 'Value', 'pixelize_mask', 'Value'],
+            ['pixelize_mask', 'Image', 'mix', 'Fac'],
+            ['scale', 'Image', 'mix', 1],
+            ['pixelize_movie', 'Image', 'mix', 2],
+            ['mix', 'Image', 'composite', 'Image'],
+            ['mix', 'Image', 'viewer', 'Image'],
+        ],
+        'drivers': [
+            {'node': 'size', 'path': 'inputs[1].default_value',
+                'type': 'AVERAGE', 'variables': [
+                    {'name': 'scale', 'type': 'SINGLE_PROP',
+                        'id_type': 'SCENE',
+                        'data_path': 'render.resolution_percentage'},
+                ]},
+        ],
+    },
+}
+
+# Compiled node tree plans by preset name
+preset_plans = {}
+
+# Add or replace preset
+def register_preset(name, spec):
+    composite_presets[name] = spec
+    preset_plans.pop(name, None)
+
+# Load user presets from json files
+def load_presets():
+    preset_dir = bpy.utils.user_resource('SCRIPTS', PRESET_DIR)
+    if not path.isdir(preset_dir):
+        return
+
+    for filename in sorted(os.listdir(preset_dir)):
+        if filename.endswith(".json"):
+            with open(path.join(preset_dir, filename)) as preset_file:
+                register_preset(filename[:-5], json.load(preset_file))
+
+# Split settings path into owner path and attribute
+def split_setting(setting):
+    owner, dot, attribute = setting.rpartition('.')
+    return owner, attribute
+
+# Node tree plan compiled from a preset spec
+class NodeTreePlan():
+    # Compile spec
+    def __init__(self, spec):
+        offset = Vector(spec.get('offset', (0, 0)))
+        self.offset = offset
+        self.single_strip = spec.get('single_strip', False)
+
+        # Node groups
+        self.groups = [
+            (name, NodeTreePlan(group))
+            for name, group in spec.get('groups', {}).items()
+        ]
+
+        # Nodes with final location and parsed settings
+        self.nodes = [(
+            node['name'], node['type'], Vector(node['location']) + offset,
+            [split_setting(setting) + (value,)
+                for setting, value in node.get('settings', {}).items()],
+            node.get('group')
+        ) for node in spec.get('nodes', [])]
+
+        # Links and drivers
+        self.links = [tuple(link) for link in spec.get('links', [])]
+        self.drivers = [(
+            driver['node'], split_setting(driver['path']), driver['type'],
+            [(variable['name'], variable['type'], variable['id_type'],
+                variable['data_path'])
+                for variable in driver.get('variables', [])]
+        ) for driver in spec.get('drivers', [])]
+
+    # Get node group, create if not existent
+    def get_group(self, name):
+        if name in bpy.data.node_groups:
+            return bpy.data.node_groups[name]
+
+        for group_name, plan in self.groups:
+            if group_name == name:
+                group = bpy.data.node_groups.new(name, 'CompositorNodeTree')
+                tag_created(group, __name__)
+                plan.instantiate(group, {})
+                return group
+
+    # Replay plan on node tree
+    def instantiate(self, node_tree, references, scene=None):
+        # Set up base nodes
+        nodes = dict(references)
+        for node in references.values():
+            node.location += self.offset
+            node.select = False
+
+        # Alias first input and scale node
+        for name in ('input', 'scale'):
+            if name +"0" in nodes:
+                nodes[name] = nodes[name +"0"]
+
+        # Place nodes relative to first scale node
+        origin = nodes['scale'].location - self.offset \
+            if 'scale' in nodes else Vector((0, 0))
+
+        # Add nodes
+        for name, node_type, location, settings, group in self.nodes:
+            node = nodes[name] = node_tree.nodes.new(node_type)
+            node.location = origin + location
+            node.select = False
+            if group is not None:
+                node.node_tree = self.get_group(group)
+            for owner, attribute, value in settings:
+                setattr(
+                    node.path_resolve(owner) if owner else node,
+                    attribute, value
+                )
+
+        # Add links
+        for from_node, from_socket, to_node, to_socket in self.links:
+            node_tree.links.new(
+                nodes[from_node].outputs[from_socket],
+                nodes[to_node].inputs[to_socket]
+            )
+
+        # Add drivers
+        for name, (owner, attribute), driver_type, variables in self.drivers:
+            node = nodes[name]
+            driver = (node.path_resolve(owner) if owner else node) \
+                .driver_add(attribute).driver
+            driver.type = driver_type
+            for var_name, var_type, id_type, data_path in variables:
+                variable = driver.variables.new()
+                variable.name = var_name
+                variable.type = var_type
+                variable.targets[0].id_type = id_type
+                variable.targets[0].id = scene
+                variable.targets[0].data_path = data_path
+
+        return nodes
+
+# Get compiled plan of preset
+def get_preset_plan(name):
+    if name not in preset_plans:
+        preset_plans[name] = NodeTreePlan(composite_presets[name])
+    return preset_plans[name]
+
+# Get preset enum items
+def get_preset_items(self, context):
+    return [(name, name, "") for name in sorted(composite_presets)]
+
 ### Effect operators ###
 ########################
 
@@ -103,73 +573,112 @@ class EffectAddOperator():
     def poll(cls, context):
         return (context.space_data.type == 'SEQUENCE_EDITOR')
 
+    # Preset and batch mode
+    preset = 'Composite'
+    batch = False
+
     # Prepare data
     def invoke(self, context, event):
         # Get source strips
-        self.source_strips = self.get_source_strips(context)
+        source_strips = self.get_source_strips(context)
 
         # Require at least one strip
-        if len(self.source_strips) == 0:
+        if len(source_strips) == 0:
             self.report(
                 {'ERROR'}, "At least one selected sequence strip is needed"
             )
             return {'CANCELLED'}
 
         # Require all strips to be images or movies
-        for seq in self.source_strips:
+        for seq in source_strips:
             if seq.type not in {'MOVIE', 'IMAGE'}:
                 self.report({'ERROR'}, "Only Image and Movie strips allowed")
                 return {'CANCELLED'}
 
-        # Find strip start and end frame
-        self.comp_strip_start = max(
-            [strip.frame_final_start for strip in self.source_strips]
-        )
-        self.comp_strip_end = min(
-            [strip.frame_final_end for strip in self.source_strips]
-        )
+        # Create one effect per strip in batch mode
+        if self.batch:
+            strip_groups = [[strip] for strip in source_strips]
+        else:
+            strip_groups = [source_strips]
+
+        # Plan effects, indexing channels once per sequence list
+        self.effects = []
+        channel_indices = {}
+        for strips in strip_groups:
+            # Find strip start and end frame
+            comp_strip_start = max([strip.frame_final_start for strip in strips])
+            comp_strip_end = min([strip.frame_final_end for strip in strips])
+
+            # Require shared frames
+            if comp_strip_start >= comp_strip_end:
+                self.report({'ERROR'}, "Strips must have shared frames")
+                return {'CANCELLED'}
 
-        # Require shared frames
-        if self.comp_strip_start >= self.comp_strip_end:
-            self.report({'ERROR'}, "Strips must have shared frames")
-            return {'CANCELLED'}
+            # Get following channel
+            highest_channel = max([strip.channel for strip in strips])
 
-        # Get following channel
-        highest_channel = max(
-            [strip.channel for strip in self.source_strips]
-        )
-        self.comp_strip_channel = (highest_channel + 1) % (MAX_CHANNEL + 1)
+            # Find first fitting channel
+            sequences = get_sequence_list(context.scene, strips[0])
+            channel_index = get_channel_index(channel_indices, sequences)
+            comp_strip_channel = channel_index.find_free_channel(
+                comp_strip_start, comp_strip_end,
+                (highest_channel + 1) % (MAX_CHANNEL + 1), highest_channel
+            )
 
-        # Get sequences per channel
-        sequences = get_sequence_list(context.scene, self.source_strips[0])
-        channel_seqs = [[] for i in range(MAX_CHANNEL + 1)]
-        for seq in sequences:
-            channel_seqs[seq.channel].append(seq)
+            # Require fitting channel
+            if comp_strip_channel is None:
+                self.report({'ERROR'}, "Fitting channel required")
+                return {'CANCELLED'}
 
-        # Find first fitting channel
-        channel_found = False
-        while self.comp_strip_channel != highest_channel:
-            # Count up on conflict
-            if any(not(seq.frame_final_end < self.comp_strip_start or \
-                self.comp_strip_end < seq.frame_final_start)
-                    for seq in channel_seqs[self.comp_strip_channel]):
-                self.comp_strip_channel = \
-                    (self.comp_strip_channel % MAX_CHANNEL) + 1
-            # Stop search else
+            # Reserve channel for following effects
+            channel_index.add(
+                comp_strip_channel, comp_strip_start, comp_strip_end
+            )
+
+            # Get scene name
+            if self.batch:
+                comp_scene_name = self.comp_scene_prefix + strips[-1].name
             else:
-                channel_found = True
-                break
+                comp_scene_name = self.comp_scene_name
 
-        # Require fitting channel
-        if not channel_found:
-            self.report({'ERROR'}, "Fitting channel required")
-            return {'CANCELLED'}
+            # Store effect
+            self.effects.append((
+                strips, comp_strip_start, comp_strip_end, comp_strip_channel,
+                comp_scene_name
+            ))
 
         # Call execute
+        self.planned = True
         return self.execute(context)
 
-    # Create effect
+    # Create effects
     def execute(self, context):
+        # Plan effects from current selection on redo and repeat
+        if not getattr(self, 'planned', False):
+            return self.invoke(context, None)
+        self.planned = False
+
+        # Get sequence editor
+        se = context.scene.sequence_editor
+
+        # Create effects
+        comp_strips = []
+        for effect in self.effects:
+            self.source_strips, self.comp_strip_start, self.comp_strip_end, \
+                self.comp_strip_channel, self.comp_scene_name = effect
+            comp_strips.append(self.create_effect(context))
+
+        # Select new strips
+        for strip in context.selected_sequences or []:
+            strip.select = False
+        for comp_strip in comp_strips:
+            comp_strip.select = True
+        se.active_strip = comp_strips[-1]
+
+        return {'FINISHED'}
+
+    # Create effect
+    def create_effect(self, context):
         # Get sequence editor
         se = context.scene.sequence_editor
 
@@ -188,19 +697,8 @@ class EffectAddOperator():
                     strip.directory, strip.elements[0].filename
                 )
 
-            # Find image
-            image = None
-            for img in bpy.data.images:
-                if img.filepath == image_path and img.source == image_source:
-                    image = img
-                    break
-
-            # Load image if not found
-            if image is None:
-                try:
-                    image = bpy.data.images.load(image_path)
-                    image.source = image_source
-                except: pass
+            # Find or load image
+            image = get_image(image_path, image_source)
 
             # Set up node
             node.image = image
@@ -240,6 +738,7 @@ class EffectAddOperator():
 
         # Add new scene
         comp_scene = bpy.data.scenes.new(self.comp_scene_name)
+        tag_created(comp_scene, self.bl_idname)
         comp_scene.sf_comp_props.is_comp_scene = True
         comp_scene.use_nodes = True
 
@@ -282,6 +781,7 @@ class EffectAddOperator():
             
         # Reset channel
         comp_strip.channel = self.comp_strip_channel
+        add_to_parent_map(context.scene, comp_strip)
 
         # Set edit screen for scene tools addon
         if hasattr(comp_scene, 'sf_scene_props'):
@@ -297,12 +797,6 @@ class EffectAddOperator():
                 comp_scene.sf_comp_props.mask_screen = screen.name
                 break
 
-        # Select new strip
-        for strip in context.selected_sequences:
-            strip.select = False
-        comp_strip.select = True
-        se.active_strip = comp_strip
-
         # Reset nodes
         nodes = comp_scene.node_tree.nodes
         for node in nodes:
@@ -319,7 +813,7 @@ class EffectAddOperator():
         # Set up nodes
         self.set_up_nodes(comp_scene, input_nodes)
 
-        return {'FINISHED'}
+        return comp_strip
 
     # Get source strips
     def get_source_strips(self, context):
@@ -333,6 +827,10 @@ class EffectAddOperator():
                 source_strips.append(strip)
                 break
 
+        # Use active strip only for single strip presets
+        if get_preset_plan(self.preset).single_strip and not self.batch:
+            return source_strips[-1:]
+
         # Return source strips
         return source_strips
 
@@ -340,11 +838,11 @@ class EffectAddOperator():
     def set_up_nodes(self, scene, input_nodes):
         # Get node tree
         node_tree = scene.node_tree
-        
+
         # Position nodes and create scale nodes
-        scale_nodes = []
+        references = {}
         node_loc = Vector((0, 0))
-        for node in input_nodes:
+        for i, node in enumerate(input_nodes):
             # Position node
             node.location = Vector(node_loc)
 
@@ -360,13 +858,17 @@ class EffectAddOperator():
                 node.outputs['Image'], scale_node.inputs['Image']
             )
 
-            # Store scale node
-            scale_nodes.append(scale_node)
+            # Store nodes
+            references["input%d" % i] = node
+            references["scale%d" % i] = scale_node
 
             # Calculate next node location
             node_loc -=  Vector((0, 360))
 
-        return scale_nodes
+        # Replay preset
+        return get_preset_plan(self.preset).instantiate(
+            node_tree, references, scene
+        )
 
 # Composite effect
 class CompositeEffectAddOperator(bpy.types.Operator, EffectAddOperator):
@@ -374,6 +876,9 @@ class CompositeEffectAddOperator(bpy.types.Operator, EffectAddOperator):
     bl_idname="sf_addons.composite_effect_add"
     bl_label="Add Composite Effect"
 
+    # Preset
+    preset = 'Composite'
+
     # Prepare data
     def invoke(self, context, event):
         # Generate compositing scene name
@@ -383,42 +888,6 @@ class CompositeEffectAddOperator(bpy.types.Operator, EffectAddOperator):
         # Initialize general effect operator
         return EffectAddOperator.invoke(self, context, event)
 
-    # Set up nodes
-    def set_up_nodes(self, scene, input_nodes):
-        # Set up input and scale nodes
-        scale_nodes = EffectAddOperator.set_up_nodes(self, scene, input_nodes)
-
-        # Get node tree
-        node_tree = scene.node_tree
-
-        # Add composite node
-        composite_node = node_tree.nodes.new('CompositorNodeComposite')
-        composite_node.location = scale_nodes[0].location + Vector((180, 0))
-
-        # Connect nodes
-        node_tree.links.new(
-            scale_nodes[0].outputs['Image'],
-            composite_node.inputs['Image']
-        )
-
-        # Add viewer node
-        viewer_node = node_tree.nodes.new('CompositorNodeViewer')
-        viewer_node.location = composite_node.location + Vector((0, -160))
-
-        # Connect nodes
-        node_tree.links.new(
-            scale_nodes[0].outputs['Image'],
-            viewer_node.inputs['Image']
-        )
-
-        # Deselect all nodes
-        for node in node_tree.nodes:
-            node.select = False
-
-        # Center nodes
-        for node in node_tree.nodes:
-            node.location += Vector((0, 640))
-
 # Composite button
 def composite_button(self, context):
     self.layout.operator(
@@ -433,83 +902,25 @@ class KeyingEffectAddOperator(bpy.types.Operator, EffectAddOperator):
     bl_idname="sf_addons.keying_effect_add"
     bl_label="Add Keying Effect"
 
+    # Properties
+    batch = bpy.props.BoolProperty(
+        name="Batch", default=False,
+        description="Add one effect per selected strip"
+    )
+
+    # Preset and scene name prefix
+    preset = 'Keying'
+    comp_scene_prefix = "Keying_"
+
     # Prepare data
     def invoke(self, context, event):
         # Generate compositing scene name
-        self.comp_scene_name = "Keying_"+ context.selected_sequences[0].name
+        self.comp_scene_name = self.comp_scene_prefix + \
+            context.selected_sequences[0].name
 
         # Initialize general effect operator
         return EffectAddOperator.invoke(self, context, event)
 
-    # Get source strips
-    def get_source_strips(self, context):
-        return EffectAddOperator.get_source_strips(self, context)[-1:]
-
-    # Set up nodes
-    def set_up_nodes(self, scene, input_nodes):
-        # Set up input and scale nodes
-        scale_node = EffectAddOperator.set_up_nodes(self, scene, input_nodes)[0]
-
-        # Get node tree
-        node_tree = scene.node_tree
-
-        # Add mask node
-        mask_node = node_tree.nodes.new('CompositorNodeMask')
-        mask_node.location = scale_node.location + Vector((-180, -360))
-
-        # Add invert node
-        invert_node = node_tree.nodes.new('CompositorNodeInvert')
-        invert_node.location = scale_node.location + Vector((0, -360))
-
-        # Connect nodes
-        node_tree.links.new(
-            mask_node.outputs['Mask'], invert_node.inputs['Color']
-        )
-
-        # Add keying node
-        keying_node = node_tree.nodes.new('CompositorNodeKeying')
-        keying_node.location = scale_node.location + Vector((180, 0))
-
-        # Connect nodes
-        node_tree.links.new(
-            scale_node.outputs['Image'], keying_node.inputs['Image']
-        )
-
-        # Add alpha converter node
-        alpha_node = node_tree.nodes.new('CompositorNodePremulKey')
-        alpha_node.location = keying_node.location + Vector((180, 0))
-
-        # Connect nodes
-        node_tree.links.new(
-            keying_node.outputs['Image'], alpha_node.inputs['Image']
-        )
-
-        # Add composite node
-        composite_node = node_tree.nodes.new('CompositorNodeComposite')
-        composite_node.location = alpha_node.location + Vector((180, 0))
-
-        # Connect nodes
-        node_tree.links.new(
-            alpha_node.outputs['Image'], composite_node.inputs['Image']
-        )
-
-        # Add viewer node
-        viewer_node = node_tree.nodes.new('CompositorNodeViewer')
-        viewer_node.location = composite_node.location + Vector((0, -160))
-
-        # Connect nodes
-        node_tree.links.new(
-            alpha_node.outputs['Image'], viewer_node.inputs['Image']
-        )
-
-        # Deselect all nodes
-        for node in node_tree.nodes:
-            node.select = False
-
-        # Center nodes
-        for node in node_tree.nodes:
-            node.location += Vector((-160, 520))
-
 # Keying button
 def keying_button(self, context):
     self.layout.operator(
@@ -517,6 +928,11 @@ def keying_button(self, context):
         text="Keying",
         icon='PLUGIN'
     )
+    self.layout.operator(
+        KeyingEffectAddOperator.bl_idname,
+        text="Keying (Batch)",
+        icon='PLUGIN'
+    ).batch = True
 
 # Pixelize effect
 class PixelizeEffectAddOperator(bpy.types.Operator, EffectAddOperator):
@@ -524,188 +940,25 @@ class PixelizeEffectAddOperator(bpy.types.Operator, EffectAddOperator):
     bl_idname="sf_addons.pixelize_effect_add"
     bl_label="Add Pixelize Effect"
 
+    # Properties
+    batch = bpy.props.BoolProperty(
+        name="Batch", default=False,
+        description="Add one effect per selected strip"
+    )
+
+    # Preset and scene name prefix
+    preset = 'Pixelize'
+    comp_scene_prefix = "Pixelize_"
+
     # Prepare data
     def invoke(self, context, event):
         # Generate compositing scene name
-        self.comp_scene_name = "Pixelize_"+ context.selected_sequences[0].name
+        self.comp_scene_name = self.comp_scene_prefix + \
+            context.selected_sequences[0].name
 
         # Initialize general effect operator
         return EffectAddOperator.invoke(self, context, event)
 
-    # Get source strips
-    def get_source_strips(self, context):
-        return EffectAddOperator.get_source_strips(self, context)[-1:]
-
-    # Set up nodes
-    def set_up_nodes(self, scene, input_nodes):
-        # Set up input and scale nodes
-        scale_node = EffectAddOperator.set_up_nodes(self, scene, input_nodes)[0]
-
-        # Get node tree
-        node_tree = scene.node_tree
-
-        # Add size node
-        size_node = node_tree.nodes.new('CompositorNodeMath')
-        size_node.name = size_node.label = 'Size'
-        size_node.operation = 'MULTIPLY'
-        size_node.inputs[0].default_value = 0.305
-        size_node.location = scale_node.location + Vector((-180, 180))
-        
-        # Resolution percentage driver
-        res_driver = size_node.inputs[1].driver_add('default_value').driver
-        res_driver.type = 'AVERAGE'
-        res_variable = res_driver.variables.new()
-        res_variable.name = "scale"
-        res_variable.type = 'SINGLE_PROP'
-        res_variable.targets[0].id_type = 'SCENE'
-        res_variable.targets[0].id = scene
-        res_variable.targets[0].data_path = 'render.resolution_percentage'
-
-        # Add mask node
-        mask_node = node_tree.nodes.new('CompositorNodeMask')
-        mask_node.location = size_node.location + Vector((0, 220))
-
-        # Create pixelize group if not existent
-        if 'Pixelize' not in bpy.data.node_groups:
-            # Create group
-            pixelize = bpy.data.node_groups.new(
-                "Pixelize", 'CompositorNodeTree'
-            )
-
-            # Add group input node
-            input_node = pixelize.nodes.new('NodeGroupInput')
-
-            # Add math node
-            divide_node = pixelize.nodes.new('CompositorNodeMath')
-            divide_node.operation = 'DIVIDE'
-            divide_node.inputs[0].default_value = 1.0
-            divide_node.location = input_node.location + Vector((180, -140))
-
-            # Add scale down node
-            scale_down_node = pixelize.nodes.new('CompositorNodeScale')
-            scale_down_node.location = divide_node.location + Vector((180, 100))
-
-            # Connect nodes
-            pixelize.links.new(
-                input_node.outputs[0], scale_down_node.inputs['Image']
-            )
-            pixelize.links.new(input_node.outputs[1], divide_node.inputs[1])
-            pixelize.links.new(
-                divide_node.outputs['Value'], scale_down_node.inputs['X']
-            )
-            pixelize.links.new(
-                divide_node.outputs['Value'], scale_down_node.inputs['Y']
-            )
-
-            # Add pixelate node
-            pixelate_node = pixelize.nodes.new('CompositorNodePixelate')
-            pixelate_node.location = scale_down_node.location + Vector((180, 0))
-
-            # Connect nodes
-            pixelize.links.new(
-                scale_down_node.outputs['Image'], pixelate_node.inputs['Color']
-            )
-
-            # Add scale up node
-            scale_up_node = pixelize.nodes.new('CompositorNodeScale')
-            scale_up_node.location = pixelate_node.location + Vector((180, 200))
-
-            # Connect nodes
-            pixelize.links.new(
-                pixelate_node.outputs['Color'], scale_up_node.inputs['Image']
-            )
-            pixelize.links.new(
-                input_node.outputs['Value'], scale_up_node.inputs['X']
-            )
-            pixelize.links.new(
-                input_node.outputs['Value'], scale_up_node.inputs['Y']
-            )
-
-            # Add group output node
-            output_node = pixelize.nodes.new('NodeGroupOutput')
-            output_node.location = scale_up_node.location + Vector((180, -160))
-
-            # Connect nodes
-            pixelize.links.new(
-                scale_up_node.outputs['Image'], output_node.inputs[0]
-            )
-
-            # Center nodes
-            for node in pixelize.nodes:
-                node.location += Vector((-60, 80))
-        else:
-            pixelize = bpy.data.node_groups['Pixelize']
-
-        # Add pixelize node
-        pixelize_movie_node = node_tree.nodes.new('CompositorNodeGroup')
-        pixelize_movie_node.node_tree = pixelize
-        pixelize_movie_node.location = scale_node.location + Vector((180, 80))
-
-        # Connect nodes
-        node_tree.links.new(
-            scale_node.outputs['Image'],
-            pixelize_movie_node.inputs['Image']
-        )
-        node_tree.links.new(
-            size_node.outputs['Value'], pixelize_movie_node.inputs['Value']
-        )
-
-        # Add pixelize node
-        pixelize_mask_node = node_tree.nodes.new('CompositorNodeGroup')
-        pixelize_mask_node.node_tree = pixelize
-        pixelize_mask_node.location = pixelize_movie_node.location \
-            + Vector((0, 160))
-
-        # Connect nodes
-        node_tree.links.new(
-            mask_node.outputs['Mask'], pixelize_mask_node.inputs['Image']
-        )
-        node_tree.links.new(
-            size_node.outputs['Value'], pixelize_mask_node.inputs['Value']
-        )
-
-        # Add mix node
-        mix_node = node_tree.nodes.new('CompositorNodeMixRGB')
-        mix_node.use_alpha = True
-        mix_node.location = pixelize_mask_node.location + Vector((180, -40))
-
-        # Connect nodes
-        node_tree.links.new(
-            pixelize_mask_node.outputs['Image'], mix_node.inputs['Fac']
-        )
-        node_tree.links.new(
-            scale_node.outputs['Image'], mix_node.inputs[1]
-        )
-        node_tree.links.new(
-            pixelize_movie_node.outputs['Image'], mix_node.inputs[2]
-        )
-
-        # Add composite node
-        composite_node = node_tree.nodes.new('CompositorNodeComposite')
-        composite_node.location = mix_node.location + Vector((180, 0))
-
-        # Connect nodes
-        node_tree.links.new(
-            mix_node.outputs['Image'], composite_node.inputs['Image']
-        )
-
-        # Add viewer node
-        viewer_node = node_tree.nodes.new('CompositorNodeViewer')
-        viewer_node.location = composite_node.location + Vector((0, -160))
-
-        # Connect nodes
-        node_tree.links.new(
-            mix_node.outputs['Image'], viewer_node.inputs['Image']
-        )
-
-        # Deselect all nodes
-        for node in node_tree.nodes:
-            node.select = False
-
-        # Center nodes
-        for node in node_tree.nodes:
-            node.location += Vector((-160, 260))
-
 # Pixelize button
 def pixelize_button(self, context):
     self.layout.operator(
@@ -713,10 +966,84 @@ def pixelize_button(self, context):
         text="Pixelize",
         icon='PLUGIN'
     )
+    self.layout.operator(
+        PixelizeEffectAddOperator.bl_idname,
+        text="Pixelize (Batch)",
+        icon='PLUGIN'
+    ).batch = True
+
+# Preset effect
+class PresetEffectAddOperator(bpy.types.Operator, EffectAddOperator):
+    # Meta data
+    bl_idname="sf_addons.preset_effect_add"
+    bl_label="Add Preset Effect"
+
+    # Properties
+    preset = bpy.props.EnumProperty(name="Preset", items=get_preset_items)
+    batch = bpy.props.BoolProperty(
+        name="Batch", default=False,
+        description="Add one effect per selected strip"
+    )
+
+    # Prepare data
+    def invoke(self, context, event):
+        # Require preset
+        if self.preset not in composite_presets:
+            self.report({'ERROR'}, "Unknown preset")
+            return {'CANCELLED'}
+
+        # Generate compositing scene name
+        self.comp_scene_prefix = self.preset +"_"
+        source_strips = self.get_source_strips(context)
+        if len(source_strips) != 0:
+            self.comp_scene_name = self.comp_scene_prefix + \
+                source_strips[-1].name
+
+        # Initialize general effect operator
+        return EffectAddOperator.invoke(self, context, event)
+
+# Preset button
+def preset_button(self, context):
+    self.layout.operator_menu_enum(
+        PresetEffectAddOperator.bl_idname, 'preset',
+        text="Composite Preset",
+        icon='PLUGIN'
+    )
 
 ### Transform3D Operator ###
 ############################
 
+# Get image plane mesh shared by all planes of an aspect ratio
+def get_plane_mesh(resolution_x, resolution_y):
+    # Get plane size
+    if resolution_x >= resolution_y:
+        width, height = 1, resolution_y / resolution_x
+    else:
+        width, height = resolution_x / resolution_y, 1
+
+    # Return existing mesh
+    mesh_name = "Transform3DPlane_%.5f" % (width / height)
+    if mesh_name in bpy.data.meshes:
+        return bpy.data.meshes[mesh_name]
+
+    # Create upright plane facing negative y
+    mesh = bpy.data.meshes.new(mesh_name)
+    tag_created(mesh, __name__)
+    mesh.from_pydata([
+        (-width, 0, -height), (width, 0, -height),
+        (width, 0, height), (-width, 0, height)
+    ], [], [(0, 1, 2, 3)])
+    mesh.update()
+
+    # Map image to plane
+    mesh.uv_textures.new("UVMap")
+    mesh.uv_layers[0].data.foreach_set('uv', (0, 0, 1, 0, 1, 1, 0, 1))
+
+    # Add material slot for object materials
+    mesh.materials.append(None)
+
+    return mesh
+
 # Add transform effect operator
 class Transform3DEffectAddOperator(bpy.types.Operator):
     # Meta data
@@ -764,30 +1091,17 @@ class Transform3DEffectAddOperator(bpy.types.Operator):
         highest_channel = max(
             [strip.channel for strip in self.source_strips]
         )
-        self.transform_strip_channel = (highest_channel + 1) % (MAX_CHANNEL + 1)
-
-        # Get sequences per channel
-        sequences = get_sequence_list(context.scene, self.source_strips[0])
-        channel_seqs = [[] for i in range(MAX_CHANNEL + 1)]
-        for seq in sequences:
-            channel_seqs[seq.channel].append(seq)
 
         # Find first fitting channel
-        channel_found = False
-        while self.transform_strip_channel != highest_channel:
-            # Count up on conflict
-            if any(not(seq.frame_final_end < self.transform_strip_start or \
-                self.transform_strip_end < seq.frame_final_start)
-                    for seq in channel_seqs[self.transform_strip_channel]):
-                self.transform_strip_channel = \
-                    (self.transform_strip_channel % MAX_CHANNEL) + 1
-            # Stop search else
-            else:
-                channel_found = True
-                break
+        sequences = get_sequence_list(context.scene, self.source_strips[0])
+        channel_index = ChannelIndex(sequences)
+        self.transform_strip_channel = channel_index.find_free_channel(
+            self.transform_strip_start, self.transform_strip_end,
+            (highest_channel + 1) % (MAX_CHANNEL + 1), highest_channel
+        )
 
         # Require fitting channel
-        if not channel_found:
+        if self.transform_strip_channel is None:
             self.report({'ERROR'}, "Fitting channel required")
             return {'CANCELLED'}
 
@@ -802,41 +1116,28 @@ class Transform3DEffectAddOperator(bpy.types.Operator):
         # Create image plane
         def create_plane(strip, y_offset, multi):
             # Add image plane
-            bpy.ops.mesh.primitive_plane_add()
-            image_plane = context.scene.objects.active
-            image_plane.name = "Plane"+ strip.name
-
-            # Scale image plane
-            res = Vector((
-                context.scene.render.resolution_x,
-                context.scene.render.resolution_y
-            ))
-            if res.x >= res.y:
-                image_plane.scale.y = res.y / res.x
-            else:
-                image_plane.scale.x = res.x / res.y
-            image_plane.rotation_euler[0] = math.radians(90)
-            bpy.ops.object.transform_apply(rotation=True, scale=True)
+            image_plane = bpy.data.objects.new(
+                "Plane"+ strip.name, get_plane_mesh(
+                    seq_scene.render.resolution_x,
+                    seq_scene.render.resolution_y
+                )
+            )
+            transform_scene.objects.link(image_plane)
+            tag_created(image_plane, self.bl_idname)
             image_plane.location.y = y_offset
 
             # Set up material
-            bpy.ops.object.material_slot_add()
             plane_material = bpy.data.materials.new(
                 "Transform3D"+ strip.name
             )
+            tag_created(plane_material, self.bl_idname)
             plane_material.use_shadeless = True
             plane_material.use_transparency = True
             plane_material.alpha = 0
+            image_plane.material_slots[0].link = 'OBJECT'
             image_plane.material_slots[0].material = plane_material
             plane_material.texture_slots.add()
-
-            # Unwrap plane
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.uv.unwrap()
-            bpy.ops.object.mode_set(mode='OBJECT')
             layer = image_plane.data.uv_layers[0]
-            layer.data[2].uv[1] = layer.data[2].uv[0]
-            layer.data[3].uv[1] = layer.data[2].uv[1]
 
             # Set up texture slot
             plane_material.texture_slots[0].uv_layer = layer.name
@@ -844,6 +1145,7 @@ class Transform3DEffectAddOperator(bpy.types.Operator):
 
             # Setup texture
             plane_texture = bpy.data.textures.new(plane_material.name, 'IMAGE')
+            tag_created(plane_texture, self.bl_idname)
 
             # Get file path
             if strip.type == 'MOVIE':
@@ -855,19 +1157,8 @@ class Transform3DEffectAddOperator(bpy.types.Operator):
                     strip.directory, strip.elements[0].filename
                 )
 
-            # Find image
-            image = None
-            for img in bpy.data.images:
-                if img.filepath == image_path and img.source == image_source:
-                    image = img
-                    break
-
-            # Load image if not found
-            if image is None:
-                try:
-                    image = bpy.data.images.load(image_path)
-                    image.source = image_source
-                except: pass
+            # Find or load image
+            image = get_image(image_path, image_source)
 
             # Assign image
             plane_texture.image = image
@@ -912,6 +1203,7 @@ class Transform3DEffectAddOperator(bpy.types.Operator):
         transform_scene = bpy.data.scenes.new(
             "Transform3D_"+ self.source_strips[-1].name
         )
+        tag_created(transform_scene, self.bl_idname)
 
         # Set up scene frames
         if len(self.source_strips) == 1:
@@ -955,6 +1247,7 @@ class Transform3DEffectAddOperator(bpy.types.Operator):
 
         # Reset channel
         transform_strip.channel = self.transform_strip_channel
+        add_to_parent_map(context.scene, transform_strip)
 
         # Set edit screen for scene tools addon
         if hasattr(transform_scene, 'sf_scene_props'):
@@ -980,15 +1273,18 @@ class Transform3DEffectAddOperator(bpy.types.Operator):
         se.active_strip = transform_strip
 
         # Set up transform scene
-        context.screen.scene = transform_scene
         transform_scene.render.alpha_mode = 'TRANSPARENT'
 
         # Add camera
-        bpy.ops.object.camera_add()
-        transform_scene.camera = transform_scene.objects.active
-        transform_scene.camera.location.y = \
-            - transform_scene.camera.data.lens / 16
-        transform_scene.camera.rotation_euler[0] = math.radians(90)
+        camera = bpy.data.objects.new(
+            "Camera", bpy.data.cameras.new("Camera")
+        )
+        transform_scene.objects.link(camera)
+        tag_created(camera, self.bl_idname)
+        tag_created(camera.data, self.bl_idname)
+        transform_scene.camera = camera
+        camera.location.y = - camera.data.lens / 16
+        camera.rotation_euler[0] = math.radians(90)
 
         # Add image planes
         if len(self.source_strips) == 1:
@@ -997,9 +1293,6 @@ class Transform3DEffectAddOperator(bpy.types.Operator):
             for offset, strip in enumerate(self.source_strips):
                 create_plane(strip, offset * 0.1, True)
 
-        # Switch back to sequencer scene
-        context.screen.scene = seq_scene
-
         return {'FINISHED'}
 
     # Get source strips
@@ -1025,6 +1318,298 @@ def transform_3d_button(self, context):
         icon='PLUGIN'
     )
 
+### Prerender cache ###
+#########################
+
+# Node properties not affecting the result
+NODE_UI_PROPS = {
+    'rna_type', 'location', 'width', 'width_hidden', 'height', 'dimensions',
+    'select', 'hide', 'label', 'color', 'use_custom_color', 'show_options',
+    'show_preview', 'show_texture', 'parent'
+}
+
+# Serialize simple struct properties
+def serialize_struct(struct, skip={'rna_type'}):
+    values = []
+    for prop in struct.bl_rna.properties:
+        if prop.identifier in skip or prop.type not in \
+            {'BOOLEAN', 'INT', 'FLOAT', 'STRING', 'ENUM'}:
+            continue
+
+        # Convert arrays and flags to comparable values
+        value = getattr(struct, prop.identifier)
+        if isinstance(value, set):
+            value = sorted(value)
+        elif not isinstance(value, (int, float, str)):
+            value = [tuple(v) if hasattr(v, '__len__') else v for v in value]
+        values.append((prop.identifier, value))
+
+    return values
+
+# Serialize animation and drivers
+def serialize_animation(id_data):
+    values = []
+    anim = id_data.animation_data
+    if anim is None:
+        return values
+
+    # Keyframes
+    if anim.action is not None:
+        for fcurve in anim.action.fcurves:
+            values.append((fcurve.data_path, fcurve.array_index, [
+                (tuple(k.co), tuple(k.handle_left), tuple(k.handle_right),
+                k.interpolation) for k in fcurve.keyframe_points
+            ]))
+
+    # Drivers
+    for fcurve in anim.drivers:
+        driver = fcurve.driver
+        values.append((
+            fcurve.data_path, fcurve.array_index, driver.type,
+            driver.expression, [(
+                variable.name, variable.type, [(
+                    target.id.name if target.id is not None else None,
+                    target.data_path, target.transform_type
+                ) for target in variable.targets]
+            ) for variable in driver.variables]
+        ))
+
+    return values
+
+# Serialize source file state
+def serialize_file(filepath, source):
+    filepath = bpy.path.abspath(filepath)
+    values = [filepath, source]
+
+    # Modification time and size of file, and directory for sequences
+    paths = [filepath]
+    if source == 'SEQUENCE':
+        paths.append(path.dirname(filepath))
+    for file_path in paths:
+        try:
+            stat = os.stat(file_path)
+            values.append((stat.st_mtime, stat.st_size))
+        except OSError:
+            values.append(None)
+
+    return values
+
+# Serialize mask
+def serialize_mask(mask):
+    values = serialize_struct(mask) + serialize_animation(mask)
+    for layer in mask.layers:
+        values.extend(serialize_struct(layer))
+        for spline in layer.splines:
+            values.extend(serialize_struct(spline))
+            for point in spline.points:
+                values.extend(serialize_struct(point))
+    return values
+
+# Serialize node tree
+def serialize_node_tree(node_tree):
+    values = serialize_animation(node_tree)
+
+    # Nodes
+    for node in node_tree.nodes:
+        values.append(node.bl_idname)
+        values.extend(serialize_struct(node, NODE_UI_PROPS))
+
+        # Unconnected input values
+        for socket in node.inputs:
+            if hasattr(socket, 'default_value'):
+                value = socket.default_value
+                if hasattr(value, '__len__'):
+                    value = tuple(value)
+                values.append((socket.identifier, value))
+
+        # Referenced data
+        if getattr(node, 'image', None) is not None:
+            values.extend(serialize_file(node.image.filepath, node.image.source))
+        if getattr(node, 'clip', None) is not None:
+            values.extend(serialize_file(node.clip.filepath, node.clip.source))
+        if getattr(node, 'mask', None) is not None:
+            values.extend(serialize_mask(node.mask))
+        if node.type == 'GROUP' and node.node_tree is not None:
+            values.extend(serialize_node_tree(node.node_tree))
+
+    # Links
+    for link in node_tree.links:
+        values.append((
+            link.from_node.name, link.from_socket.identifier,
+            link.to_node.name, link.to_socket.identifier
+        ))
+
+    return values
+
+# Get content key of composite scene
+def get_prerender_key(scene):
+    render = scene.render
+    values = [
+        scene.frame_start, scene.frame_end, scene.use_nodes,
+        render.resolution_x, render.resolution_y,
+        render.resolution_percentage, render.pixel_aspect_x,
+        render.pixel_aspect_y, render.fps, render.fps_base,
+        render.alpha_mode, scene.view_settings.view_transform,
+        scene.view_settings.look, scene.view_settings.exposure,
+        scene.view_settings.gamma, scene.display_settings.display_device
+    ]
+    if scene.node_tree is not None:
+        values.extend(serialize_node_tree(scene.node_tree))
+
+    return hashlib.sha1(repr(values).encode()).hexdigest()
+
+# Get prerendered frame file names of scene
+def get_prerender_files(scene):
+    return [
+        "%04d.png" % frame
+        for frame in range(scene.frame_start, scene.frame_end + 1)
+    ]
+
+# Render scene to cache directory unless cached
+def prerender_scene(scene, cache_dir):
+    # Return on cache hit
+    files = get_prerender_files(scene)
+    if path.isdir(cache_dir) \
+    and set(files).issubset(os.listdir(cache_dir)):
+        return False
+
+    # Store output settings
+    render = scene.render
+    settings = (
+        render.filepath, render.use_file_extension,
+        render.image_settings.file_format, render.image_settings.color_mode
+    )
+
+    # Render animation
+    render.filepath = cache_dir + os.sep
+    render.use_file_extension = True
+    render.image_settings.file_format = 'PNG'
+    render.image_settings.color_mode = 'RGBA'
+    try:
+        bpy.ops.render.render(animation=True, scene=scene.name)
+    finally:
+        # Restore output settings
+        render.filepath, render.use_file_extension, \
+            render.image_settings.file_format, \
+            render.image_settings.color_mode = settings
+
+    return True
+
+# Replace top level strip with prerendered image strip
+def swap_to_prerender(context, strip, scene, cache_dir):
+    sequences = context.scene.sequence_editor.sequences
+    files = get_prerender_files(scene)
+
+    # Store strip placement
+    name = strip.name
+    channel = strip.channel
+    frame_start = strip.frame_start
+    frame_offset_start = strip.frame_offset_start
+    frame_offset_end = strip.frame_offset_end
+    blend_type = strip.blend_type
+    blend_alpha = strip.blend_alpha
+
+    # Remove strip
+    sequences.remove(strip)
+
+    # Add image strip
+    image_strip = sequences.new_image(
+        name, path.join(cache_dir, files[0]), channel, frame_start
+    )
+    for filename in files[1:]:
+        image_strip.elements.append(filename)
+    image_strip.sf_prerender_scene = scene.name
+
+    # Restore placement
+    image_strip.frame_start = frame_start
+    image_strip.frame_offset_start = frame_offset_start
+    image_strip.frame_offset_end = frame_offset_end
+    image_strip.channel = channel
+    image_strip.blend_type = blend_type
+    image_strip.blend_alpha = blend_alpha
+    add_to_parent_map(context.scene, image_strip)
+
+    return image_strip
+
+# Prerender composite scenes operator
+class PrerenderEffectsOperator(bpy.types.Operator):
+    # Meta data
+    bl_idname = "sf_addons.prerender_composite_effects"
+    bl_label = "Prerender Composite Effects"
+    bl_description = "Render selected composite scene strips to images"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Show only in sequence editor
+    @classmethod
+    def poll(cls, context):
+        return context.space_data.type == 'SEQUENCE_EDITOR' \
+            and context.scene.sequence_editor is not None
+
+    # Prerender stale strips
+    def execute(self, context):
+        # Require saved file for relative cache directory
+        if bpy.data.filepath == "":
+            self.report({'ERROR'}, "Save the file before prerendering")
+            return {'CANCELLED'}
+
+        # Collect composite scene strips and prerendered strips
+        strips = []
+        for strip in context.selected_sequences or []:
+            if strip.type == 'SCENE' and strip.scene is not None \
+            and strip.scene.sf_comp_props.is_comp_scene:
+                strips.append((strip, strip.scene))
+            elif strip.type == 'IMAGE' \
+            and strip.sf_prerender_scene in bpy.data.scenes:
+                strips.append(
+                    (strip, bpy.data.scenes[strip.sf_prerender_scene])
+                )
+
+        # Render and swap strips
+        rendered = swapped = nested = 0
+        for strip, scene in strips:
+            # Skip strips inside meta strips before touching them
+            if get_meta_path(context.scene, strip) != ():
+                nested += 1
+                continue
+
+            cache_dir = bpy.path.abspath(
+                path.join(PRERENDER_DIR, get_prerender_key(scene))
+            )
+
+            # Skip up to date image strips
+            if strip.type == 'IMAGE' and path.normpath(
+                bpy.path.abspath(strip.directory)
+            ) == path.normpath(cache_dir):
+                continue
+
+            # Render stale scenes
+            if prerender_scene(scene, cache_dir):
+                rendered += 1
+
+            # Swap in image strip
+            swap_to_prerender(context, strip, scene, cache_dir)
+            swapped += 1
+
+        if nested != 0:
+            self.report({'WARNING'}, "Rendered %d, updated %d strips, "
+                "skipped %d strips inside meta strips" % (
+                    rendered, swapped, nested
+                )
+            )
+        else:
+            self.report(
+                {'INFO'}, "Rendered %d, updated %d strips" % (rendered, swapped)
+            )
+        return {'FINISHED'}
+
+# Prerender button
+def prerender_button(self, context):
+    self.layout.operator(
+        PrerenderEffectsOperator.bl_idname,
+        text="Prerender Composite Effects",
+        icon='RENDER_ANIMATION'
+    )
+
 ### Composite scene Panel ###
 #############################
 
@@ -1075,18 +1660,8 @@ class SwitchToMaskOperator(bpy.types.Operator):
         if clip_area is not None:
             if len(image_nodes) in {1, 2} and \
                 image_nodes[0].image is not None:
-                # Find clip
-                mask_clip = None
-                for clip in bpy.data.movieclips:
-                    if clip.filepath == image_nodes[0].image.filepath:
-                        mask_clip = clip
-                        break
-
-                # Load clip if not found
-                if mask_clip is None:
-                    mask_clip = bpy.data.movieclips.load(
-                        image_nodes[0].image.filepath
-                    )
+                # Find or load clip
+                mask_clip = get_clip(image_nodes[0].image.filepath)
 
                 # Set clip
                 clip_area.spaces[0].clip = mask_clip
@@ -1102,6 +1677,7 @@ class SwitchToMaskOperator(bpy.types.Operator):
                         mask_nodes[0].mask = bpy.data.masks.new(
                             composite_scene.name
                         )
+                        tag_created(mask_nodes[0].mask, self.bl_idname)
 
                     # Edit mask
                     clip_area.spaces[0].mask = mask_nodes[0].mask
@@ -1138,16 +1714,32 @@ def register():
     # Register module
     bpy.utils.register_module(__name__)
 
+    # Load user presets
+    load_presets()
+
     # Register scene properties
     bpy.types.Scene.sf_comp_props = bpy.props.PointerProperty(
         type=SceneCompositeProps
     )
 
+    # Register strip properties
+    bpy.types.ImageSequence.sf_prerender_scene = bpy.props.StringProperty(
+        name="Prerendered Scene"
+    )
+
+    # Add handlers
+    bpy.app.handlers.load_post.append(clear_caches)
+    bpy.app.handlers.undo_post.append(clear_caches)
+    bpy.app.handlers.redo_post.append(clear_caches)
+    bpy.app.handlers.scene_update_post.append(update_caches)
+
     # Add buttons
     bpy.types.SEQUENCER_MT_add_effect.append(composite_button)
     bpy.types.SEQUENCER_MT_add_effect.append(keying_button)
     bpy.types.SEQUENCER_MT_add_effect.append(pixelize_button)
+    bpy.types.SEQUENCER_MT_add_effect.append(preset_button)
     bpy.types.SEQUENCER_MT_add_effect.append(transform_3d_button)
+    bpy.types.SEQUENCER_MT_strip.append(prerender_button)
 
 # Unregister module
 def unregister():
@@ -1157,11 +1749,22 @@ def unregister():
     # Unregister scene properties
     del bpy.types.Scene.sf_comp_props
 
+    # Unregister strip properties
+    del bpy.types.ImageSequence.sf_prerender_scene
+
+    # Remove handlers
+    bpy.app.handlers.load_post.remove(clear_caches)
+    bpy.app.handlers.undo_post.remove(clear_caches)
+    bpy.app.handlers.redo_post.remove(clear_caches)
+    bpy.app.handlers.scene_update_post.remove(update_caches)
+
     # Remove buttons
     bpy.types.SEQUENCER_MT_add_effect.remove(composite_button)
     bpy.types.SEQUENCER_MT_add_effect.remove(keying_button)
     bpy.types.SEQUENCER_MT_add_effect.remove(pixelize_button)
+    bpy.types.SEQUENCER_MT_add_effect.remove(preset_button)
     bpy.types.SEQUENCER_MT_add_effect.remove(transform_3d_button)
+    bpy.types.SEQUENCER_MT_strip.remove(prerender_button)
 
 # Register if executed as script
 if __name__ == '__main__':
@@ -0,0 +1,444 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Add-on meta data
+bl_info = {
+    "name": "Scene Tools",
+    "author": "Salatfreak",
+    "version": (0, 1),
+    "blender": (2, 75),
+    "location": "Video Sequence Editor > Strip > Render Scene Strips",
+    "description": "Renders scene strips and purges unused effect data",
+    "warning": "",
+    "wiki_url": "",
+    "category": "Sequencer"
+}
+
+# Constants
+DEFAULT_DIR = "//renders/scenes"
+CREATED_BY = "sf_created_by"
+
+# Import modules
+import bpy
+import os
+import re
+import subprocess
+import threading
+from os import path
+from collections import deque
+from bpy.app.handlers import persistent
+
+### Helper functions ###
+########################
+
+# Get scenes of scene strips
+def get_strip_scenes(context, selected_only):
+    scenes = []
+    for strip in context.scene.sequence_editor.sequences_all:
+        if strip.type == 'SCENE' and strip.scene is not None \
+        and strip.scene != context.scene and strip.scene not in scenes \
+        and (strip.select or not selected_only):
+            scenes.append(strip.scene)
+    return scenes
+
+# Split frame range of scene into chunks
+def get_frame_chunks(scene, chunk_size):
+    return [
+        (start, min(start + chunk_size - 1, scene.frame_end))
+        for start in range(scene.frame_start, scene.frame_end + 1, chunk_size)
+    ]
+
+### Render worker ###
+#####################
+
+# Saved frame output pattern
+saved_re = re.compile(r"^Saved: ")
+
+# Background render process for one scene frame chunk
+class RenderWorker():
+    # Start process
+    def __init__(self, blend_path, scene_name, start, end, output, threads):
+        self.frames = end - start + 1
+        self.rendered = 0
+        self.process = subprocess.Popen([
+            bpy.app.binary_path, "-b", blend_path, "-S", scene_name,
+            "-o", output, "-F", 'PNG', "-x", "1", "-t", str(threads),
+            "-s", str(start), "-e", str(end), "-a"
+        ], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            universal_newlines=True)
+
+        # Read progress from output pipe
+        self.thread = threading.Thread(target=self.read_output, daemon=True)
+        self.thread.start()
+
+    # Count saved frames
+    def read_output(self):
+        for line in self.process.stdout:
+            if saved_re.match(line):
+                self.rendered += 1
+
+    # Check if process finished
+    def is_done(self):
+        return self.process.poll() is not None
+
+    # Stop process
+    def terminate(self):
+        if not self.is_done():
+            self.process.terminate()
+
+### Render operator ###
+#######################
+
+# Render scene strips with background processes
+class RenderSceneStripsOperator(bpy.types.Operator):
+    # Meta data
+    bl_idname = "sf_addons.render_scene_strips"
+    bl_label = "Render Scene Strips"
+    bl_description = "Render scenes of scene strips in background processes"
+
+    # Properties
+    selected_only = bpy.props.BoolProperty(
+        name="Selected Only", default=True,
+        description="Only render scenes of selected strips"
+    )
+    workers = bpy.props.IntProperty(
+        name="Workers", min=0, default=0,
+        description="Number of render processes, 0 for one per core"
+    )
+    chunk_size = bpy.props.IntProperty(
+        name="Chunk Size", min=1, default=50,
+        description="Number of frames rendered per process"
+    )
+
+    # Show only in sequence editor
+    @classmethod
+    def poll(cls, context):
+        return context.space_data.type == 'SEQUENCE_EDITOR' \
+            and context.scene.sequence_editor is not None
+
+    # Start rendering
+    def invoke(self, context, event):
+        # Require saved file for worker processes
+        if bpy.data.filepath == "" or bpy.data.is_dirty:
+            self.report({'ERROR'}, "Save the file before rendering")
+            return {'CANCELLED'}
+
+        # Queue frame chunks of all scenes
+        self.jobs = deque()
+        for scene in get_strip_scenes(context, self.selected_only):
+            output = path.join(
+                bpy.path.abspath(DEFAULT_DIR), bpy.path.clean_name(scene.name),
+                "####"
+            )
+            for start, end in get_frame_chunks(scene, self.chunk_size):
+                self.jobs.append((scene.name, start, end, output))
+
+        # Require scenes
+        if len(self.jobs) == 0:
+            self.report({'ERROR'}, "No scene strips to render")
+            return {'CANCELLED'}
+
+        # Share cores between workers
+        cores = os.cpu_count() or 1
+        self.worker_count = min(self.workers or cores, len(self.jobs))
+        self.threads = max(1, cores // self.worker_count)
+
+        # Set up progress
+        self.total = sum(end - start + 1 for name, start, end, o in self.jobs)
+        self.finished = 0
+        self.failed = 0
+        self.running = []
+        context.window_manager.progress_begin(0, self.total)
+
+        # Start polling
+        self.timer = context.window_manager.event_timer_add(
+            0.25, context.window
+        )
+        context.window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    # Schedule workers and report progress
+    def modal(self, context, event):
+        # Cancel on escape
+        if event.type == 'ESC':
+            for worker in self.running:
+                worker.terminate()
+            self.finish(context)
+            self.report({'WARNING'}, "Rendering cancelled")
+            return {'CANCELLED'}
+
+        # Only poll on timer
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        # Collect finished workers
+        for worker in [w for w in self.running if w.is_done()]:
+            worker.thread.join()
+            self.running.remove(worker)
+            self.finished += worker.frames
+            if worker.process.returncode != 0:
+                self.failed += 1
+
+        # Start queued jobs
+        while len(self.jobs) != 0 and len(self.running) < self.worker_count:
+            name, start, end, output = self.jobs.popleft()
+            self.running.append(RenderWorker(
+                bpy.data.filepath, name, start, end, output, self.threads
+            ))
+
+        # Report progress
+        rendered = self.finished + sum(w.rendered for w in self.running)
+        context.window_manager.progress_update(rendered)
+        context.area.header_text_set(
+            "Rendering scene strips: %d / %d frames" % (rendered, self.total)
+        )
+
+        # Finish when all jobs are done
+        if len(self.running) == 0 and len(self.jobs) == 0:
+            self.finish(context)
+            if self.failed != 0:
+                self.report(
+                    {'ERROR'}, "%d render processes failed" % self.failed
+                )
+            return {'FINISHED'}
+
+        return {'PASS_THROUGH'}
+
+    # Clean up
+    def finish(self, context):
+        context.window_manager.event_timer_remove(self.timer)
+        context.window_manager.progress_end()
+        context.area.header_text_set()
+
+# Render button
+def render_button(self, context):
+    self.layout.operator(
+        RenderSceneStripsOperator.bl_idname,
+        icon='RENDER_ANIMATION'
+    )
+
+### Orphan collector ###
+########################
+
+# Tag datablock as created by an add-on for the orphan collector
+def tag_created(datablock, creator):
+    datablock[CREATED_BY] = creator
+
+# Datablock collections in removal order
+ID_COLLECTIONS = [
+    'scenes', 'objects', 'meshes', 'cameras', 'curves', 'materials',
+    'textures', 'images', 'movieclips', 'worlds', 'masks', 'node_groups'
+]
+
+# Get datablocks referenced by datablock
+def get_references(datablock):
+    references = []
+
+    # Scene contents
+    if isinstance(datablock, bpy.types.Scene):
+        references.extend(datablock.objects)
+        references.append(datablock.world)
+        if datablock.node_tree is not None:
+            references.extend(get_references(datablock.node_tree))
+
+    # Node tree contents
+    elif isinstance(datablock, bpy.types.NodeTree):
+        for node in datablock.nodes:
+            for attribute in ('image', 'clip', 'mask', 'node_tree'):
+                references.append(getattr(node, attribute, None))
+
+    # Object data and materials
+    elif isinstance(datablock, bpy.types.Object):
+        references.append(datablock.data)
+        references.extend(slot.material for slot in datablock.material_slots
+            if slot.link == 'OBJECT')
+
+    # Data materials
+    elif isinstance(datablock, (bpy.types.Mesh, bpy.types.Curve)):
+        references.extend(datablock.materials)
+
+    # Material textures
+    elif isinstance(datablock, bpy.types.Material):
+        references.extend(slot.texture
+            for slot in datablock.texture_slots if slot is not None)
+
+    # Texture image
+    elif isinstance(datablock, bpy.types.ImageTexture):
+        references.append(datablock.image)
+
+    return [reference for reference in references if reference is not None]
+
+# Get names of scenes still in use
+def get_used_scenes():
+    used = set(screen.scene.name for screen in bpy.data.screens)
+    for scene in bpy.data.scenes:
+        if scene.sequence_editor is None:
+            continue
+
+        # Scene strips and strips prerendered from scenes
+        for strip in scene.sequence_editor.sequences_all:
+            if strip.type == 'SCENE' and strip.scene is not None:
+                used.add(strip.scene.name)
+            elif strip.get('sf_prerender_scene'):
+                used.add(strip['sf_prerender_scene'])
+            elif strip.get('sf_text_scene'):
+                used.add(strip['sf_text_scene'])
+
+    return used
+
+# Find add-on datablocks left unreferenced by deleted effect strips
+def find_orphans():
+    # Start with unused effect scenes
+    used = get_used_scenes()
+    queue = [scene for scene in bpy.data.scenes
+        if CREATED_BY in scene and scene.name not in used]
+
+    # Follow references until no more datablocks lose all users
+    orphans = []
+    users = {}
+    while len(queue) != 0:
+        datablock = queue.pop()
+        orphans.append(datablock)
+        for reference in get_references(datablock):
+            key = reference.as_pointer()
+            users[key] = users.get(key, reference.users) - 1
+            if users[key] == 0 and CREATED_BY in reference:
+                queue.append(reference)
+
+    # Add tagged datablocks without users
+    pointers = set(orphan.as_pointer() for orphan in orphans)
+    for collection in ID_COLLECTIONS:
+        for datablock in getattr(bpy.data, collection):
+            if CREATED_BY in datablock and datablock.users == 0 \
+            and datablock.as_pointer() not in pointers:
+                orphans.append(datablock)
+
+    return orphans
+
+# Estimate memory of datablocks in bytes
+def estimate_memory(datablocks):
+    memory = 0
+    for datablock in datablocks:
+        if isinstance(datablock, bpy.types.Image) and datablock.has_data:
+            memory += datablock.size[0] * datablock.size[1] \
+                * datablock.channels * (4 if datablock.is_float else 1)
+        elif isinstance(datablock, bpy.types.Mesh):
+            memory += 64 * (len(datablock.vertices) + len(datablock.loops))
+    return memory
+
+# Remove datablocks
+def purge_datablocks(datablocks):
+    pointers = set(datablock.as_pointer() for datablock in datablocks)
+
+    # Remove users before used datablocks
+    removed = 0
+    for collection_name in ID_COLLECTIONS:
+        collection = getattr(bpy.data, collection_name)
+        for datablock in list(collection):
+            if datablock.as_pointer() in pointers:
+                datablock.user_clear()
+                collection.remove(datablock)
+                removed += 1
+
+    return removed
+
+# Purge orphaned add-on datablocks operator
+class PurgeOrphansOperator(bpy.types.Operator):
+    # Meta data
+    bl_idname = "sf_addons.purge_effect_orphans"
+    bl_label = "Purge Effect Orphans"
+    bl_description = "Remove data left behind by deleted effect strips"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Report reclaimable data and ask for confirmation
+    def invoke(self, context, event):
+        orphans = find_orphans()
+        if len(orphans) == 0:
+            self.report({'INFO'}, "No orphaned effect data")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, "%d datablocks, about %.1f MB reclaimable" % (
+            len(orphans), estimate_memory(orphans) / 1048576
+        ))
+        return context.window_manager.invoke_confirm(self, event)
+
+    # Remove orphans
+    def execute(self, context):
+        removed = purge_datablocks(find_orphans())
+        self.report({'INFO'}, "Removed %d datablocks" % removed)
+        return {'FINISHED'}
+
+# Purge orphans before saving if enabled
+@persistent
+def purge_orphans_on_save(*args):
+    addon = bpy.context.user_preferences.addons.get(__name__)
+    if addon is not None and addon.preferences.purge_on_save:
+        purge_datablocks(find_orphans())
+
+# Purge button
+def purge_button(self, context):
+    self.layout.operator(PurgeOrphansOperator.bl_idname, icon='GHOST_DISABLED')
+
+### Add-on preferences ###
+##########################
+
+# Scene tools preferences
+class SceneToolsPreferences(bpy.types.AddonPreferences):
+    bl_idname = __name__
+
+    # Purge on save property
+    purge_on_save = bpy.props.BoolProperty(
+        name="Purge Effect Orphans on Save", default=False,
+        description="Remove data left behind by deleted effect strips"
+            " before saving"
+    )
+
+    # Draw preferences
+    def draw(self, context):
+        self.layout.prop(self, 'purge_on_save')
+
+### Module registration ###
+###########################
+
+# Register module
+def register():
+    # Register module
+    bpy.utils.register_module(__name__)
+
+    # Add handler
+    bpy.app.handlers.save_pre.append(purge_orphans_on_save)
+
+    # Add buttons
+    bpy.types.SEQUENCER_MT_strip.append(render_button)
+    bpy.types.SEQUENCER_MT_strip.append(purge_button)
+
+# Unregister module
+def unregister():
+    # Unregister module
+    bpy.utils.unregister_module(__name__)
+
+    # Remove handler
+    bpy.app.handlers.save_pre.remove(purge_orphans_on_save)
+
+    # Remove buttons
+    bpy.types.SEQUENCER_MT_strip.remove(render_button)
+    bpy.types.SEQUENCER_MT_strip.remove(purge_button)
+
+# Register if executed as script
+if __name__ == '__main__':
+    register()
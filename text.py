@@ -32,40 +32,121 @@ bl_info = {
 # Constants
 MAX_CHANNEL = 32
 DEFAULT_DIR = "//renders/text"
+SHARED_PREFIX = "SF Shared "
 
 # Import modules
 import bpy
+import os
 import re
+import hashlib
 from os import path
+from bisect import bisect_right
+from bpy.app.handlers import persistent
+from scenetools import CREATED_BY, tag_created
+
+### Text object cache ###
+#########################
+
+# Text object name and object count by scene name
+text_objects = {}
+
+# Get first text object of scene
+def get_text_object(scene):
+    # Use cached object while no object was added or removed
+    object_count = len(scene.objects)
+    cached = text_objects.get(scene.name)
+    if cached is not None and cached[1] == object_count:
+        if cached[0] is None:
+            return None
+        obj = scene.objects.get(cached[0])
+        if obj is not None and obj.type == 'FONT':
+            return obj
+
+    # Search scene objects
+    text_object = None
+    for obj in scene.objects:
+        if obj.type == 'FONT':
+            text_object = obj
+            break
+
+    # Store found object
+    text_objects[scene.name] = (
+        None if text_object is None else text_object.name, object_count
+    )
+    return text_object
+
+# Clear text object cache
+@persistent
+def clear_text_objects(*args):
+    text_objects.clear()
+    datablock_pool.clear()
+    title_keys.clear()
+
+### Text scene registry ###
+###########################
+
+# Names of text scenes
+text_scenes = set()
+text_scenes_built = False
+
+# Tag and register new text scene
+def add_text_scene(scene):
+    scene.sf_is_text_scene = True
+    text_scenes.add(scene.name)
+
+# Rebuild registry from tagged scenes
+@persistent
+def build_text_scenes(*args):
+    global text_scenes_built
+    text_scenes_built = True
+    text_scenes.clear()
+    text_scenes.update(
+        scene.name for scene in bpy.data.scenes if scene.sf_is_text_scene
+    )
+
+# Build registry after registration and refresh it when scenes were added,
+# removed or renamed
+@persistent
+def update_text_scenes(scene):
+    if not text_scenes_built:
+        build_text_scenes()
+    elif bpy.data.scenes.is_updated:
+        build_text_scenes()
 
 ### Object Properties ###
 #########################
 
+# Get text scene of scene strip or prerendered image strip
+def get_strip_scene(strip):
+    if strip.type == 'SCENE':
+        return strip.scene
+    return bpy.data.scenes.get(strip.get('sf_text_scene', ""))
+
+# Get text object of strip, None for strips without text scene
+def get_strip_text_object(strip):
+    scene = get_strip_scene(strip)
+    return None if scene is None else get_text_object(scene)
+
 # Location
 def get_location(self):
-    text_object = list(filter(
-        lambda o: o.type == 'FONT', self.scene.objects
-    ))[0]
-    return text_object.location.xy
+    text_object = get_strip_text_object(self)
+    return (0.0, 0.0) if text_object is None else text_object.location.xy
 def set_location(self, location):
-    text_object = list(filter(
-        lambda o: o.type == 'FONT', self.scene.objects
-    ))[0]
-    text_object.location.xy = location
+    text_object = get_strip_text_object(self)
+    if text_object is not None:
+        text_object.location.xy = location
 text_location = bpy.props.FloatVectorProperty(
     size=2, name="Location", get=get_location, set=set_location
 )
 
 # Scale
 def get_scale(self):
-    text_object = list(filter(
-        lambda o: o.type == 'FONT', self.scene.objects
-    ))[0]
-    return text_object.scale.x
+    text_object = get_strip_text_object(self)
+    return 1.0 if text_object is None else text_object.scale.x
 def set_scale(self, scale):
-    text_object = list(filter(
-        lambda o: o.type == 'FONT', self.scene.objects
-    ))[0]
+    text_object = get_strip_text_object(self)
+    if text_object is None:
+        return
     if text_object.scale.x == 0:
         text_object.scale.yz = (scale, scale)
     else:
@@ -74,6 +155,206 @@ def set_scale(self, scale):
     text_object.scale.x = scale
 text_scale = bpy.props.FloatProperty(name="Scale", get=get_scale, set=set_scale)
 
+# Get text material of strip
+def get_strip_material(strip):
+    text_object = get_strip_text_object(strip)
+    if text_object is None or len(text_object.material_slots) == 0:
+        return None
+    return text_object.material_slots[0].material
+
+# Text color, copied before editing if shared with other text strips
+def get_text_color(self):
+    material = get_strip_material(self)
+    return (1.0, 1.0, 1.0) if material is None else tuple(material.diffuse_color)
+def set_text_color(self, color):
+    text_object = get_strip_text_object(self)
+    if text_object is not None and len(text_object.material_slots) != 0:
+        material = single_user_material(text_object.material_slots[0])
+        if material is not None:
+            material.diffuse_color = color
+text_color = bpy.props.FloatVectorProperty(
+    size=3, subtype='COLOR', min=0.0, max=1.0, name="Color",
+    get=get_text_color, set=set_text_color
+)
+
+# Background color, copied before editing if shared with other text strips
+def get_background_color(self):
+    scene = get_strip_scene(self)
+    if scene is None or scene.world is None:
+        return (0.0, 0.0, 0.0)
+    return tuple(scene.world.horizon_color)
+def set_background_color(self, color):
+    scene = get_strip_scene(self)
+    if scene is not None and scene.world is not None:
+        single_user_world(scene).horizon_color = color
+background_color = bpy.props.FloatVectorProperty(
+    size=3, subtype='COLOR', min=0.0, max=1.0, name="Background",
+    get=get_background_color, set=set_background_color
+)
+
+### Datablock pool ###
+########################
+
+# Pooled datablock names by content key
+datablock_pool = {}
+
+# Content keys of shared datablocks
+def get_world_key(world):
+    return (tuple(round(c, 4) for c in world.horizon_color),)
+def set_world_key(world, key):
+    world.horizon_color = key[0]
+def get_material_key(material):
+    return (
+        tuple(round(c, 4) for c in material.diffuse_color),
+        material.use_shadeless
+    )
+def set_material_key(material, key):
+    material.diffuse_color, material.use_shadeless = key
+
+# Get shared datablock with content key or create it
+def get_pooled(collection, name, get_key, key, set_key):
+    # Look up pooled datablock, dropping it if edited or removed
+    pool_key = (collection.rna_type.identifier, key)
+    datablock = collection.get(datablock_pool.get(pool_key, ""))
+    if datablock is not None and get_key(datablock) == key:
+        return datablock
+
+    # Search shared add-on datablocks
+    for datablock in collection:
+        if CREATED_BY in datablock and datablock.name.startswith(
+            SHARED_PREFIX
+        ) and get_key(datablock) == key:
+            break
+
+    # Create datablock, named to show it is shared in other editors
+    else:
+        datablock = collection.new(SHARED_PREFIX + name)
+        set_key(datablock, key)
+        tag_created(datablock, __name__)
+
+    datablock_pool[pool_key] = datablock.name
+    return datablock
+
+# Copy shared world of text scene
+def single_user_world(scene, creator=__name__):
+    if scene.world is not None and scene.world.users > 1:
+        scene.world = scene.world.copy()
+        scene.world.name = "Text"
+        tag_created(scene.world, creator)
+    return scene.world
+
+# Copy shared material of material slot
+def single_user_material(slot, creator=__name__):
+    if slot.material is not None and slot.material.users > 1:
+        slot.material = slot.material.copy()
+        slot.material.name = "Text"
+        tag_created(slot.material, creator)
+    return slot.material
+
+# Make world and material of text scene single user for editing
+class TextSingleUserOperator(bpy.types.Operator):
+    # Meta data
+    bl_idname = "sf_addons.text_single_user"
+    bl_label = "Make Single User"
+    bl_description = "Copy colors shared with other text strips. Editing "\
+        "SF Shared worlds and materials elsewhere changes all of them"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Show only for text strips
+    @classmethod
+    def poll(cls, context):
+        return TextStripPanel.poll(context)
+
+    # Copy shared datablocks
+    def execute(self, context):
+        text_scene = get_strip_scene(context.scene.sequence_editor.active_strip)
+        text_object = get_text_object(text_scene)
+
+        # World and materials
+        single_user_world(text_scene, self.bl_idname)
+        for slot in text_object.material_slots:
+            single_user_material(slot, self.bl_idname)
+
+        return {'FINISHED'}
+
+### Text scene creation ###
+#############################
+
+# Create text scene with camera, text object and material
+def create_text_scene(context, name, body, creator):
+    # Add new scene
+    text_scene = bpy.data.scenes.new(name)
+    tag_created(text_scene, creator)
+    add_text_scene(text_scene)
+
+    # Copy render settings
+    text_scene.render.resolution_x = context.scene.render.resolution_x
+    text_scene.render.resolution_y = context.scene.render.resolution_y
+    text_scene.render.resolution_percentage = 100
+    text_scene.render.fps = context.scene.render.fps
+
+    # Output settings
+    text_scene.render.use_overwrite = True
+    text_scene.render.use_file_extension = False
+    text_scene.render.image_settings.file_format = 'PNG'
+    text_scene.render.filepath = path.join(
+        DEFAULT_DIR, text_scene.name.partition("_")[2] +".png"
+    )
+
+    # Set edit screen for scene tools addon
+    if hasattr(text_scene, 'sf_scene_props'):
+        # Find first screen containing default
+        screen_found = False
+        for screen in bpy.data.screens:
+            if "default" in screen.name.lower():
+                text_scene.sf_scene_props.edit_screen = screen.name
+                screen_found = True
+                break
+
+        # Find first screen containing 3d else
+        if not screen_found:
+            for screen in bpy.data.screens:
+                if "3d" in screen.name.lower():
+                    text_scene.sf_scene_props.edit_screen = screen.name
+                    break
+
+    # Set up text scene
+    text_scene.frame_start = text_scene.frame_end = 1
+    text_scene.render.alpha_mode = 'TRANSPARENT'
+    text_scene.world = get_pooled(
+        bpy.data.worlds, "Text", get_world_key, ((0.0, 0.0, 0.0),),
+        set_world_key
+    )
+
+    # Add camera, not pooled as its lens is edited in the text scene
+    camera_data = bpy.data.cameras.new("Camera")
+    text_scene.camera = bpy.data.objects.new("Camera", camera_data)
+    text_scene.objects.link(text_scene.camera)
+    text_scene.camera.location.z = camera_data.lens / 16
+    tag_created(text_scene.camera, creator)
+    tag_created(camera_data, creator)
+
+    # Add text
+    text_curve = bpy.data.curves.new("Text", 'FONT')
+    text_curve.offset_y = -0.35
+    text_curve.align_x = 'CENTER'
+    text_curve.body = body
+    text_object = bpy.data.objects.new("Text", text_curve)
+    text_scene.objects.link(text_object)
+    tag_created(text_object, creator)
+    tag_created(text_curve, creator)
+
+    # Set up material
+    text_curve.materials.append(get_pooled(
+        bpy.data.materials, "Text", get_material_key,
+        ((1.0, 1.0, 1.0), True), set_material_key
+    ))
+
+    # Position text
+    text_object.scale.xyz = 0.3
+
+    return text_scene
+
 ### Effect operator ###
 ########################
 
@@ -94,10 +375,6 @@ class TextSceneAddOperator(bpy.types.Operator):
 
     # Prepare data
     def invoke(self, context, event):
-        # Set start and end frame
-        self.text_strip_start = context.scene.frame_current
-        self.text_strip_duration = 5 * context.scene.render.fps
-
         # Show property dialog
         wm = context.window_manager
         return wm.invoke_props_dialog(self)
@@ -108,81 +385,17 @@ class TextSceneAddOperator(bpy.types.Operator):
 
     # Add rendered text
     def execute(self, context):
-        # Store Sequencer Scene
-        sequencer_scene = context.scene
+        # Set start and end frame
+        self.text_strip_start = context.scene.frame_current
+        self.text_strip_duration = 5 * context.scene.render.fps
 
         # Add new scene
-        text_scene = bpy.data.scenes.new(
-            "Text_"+ re.sub(
+        text_scene = create_text_scene(
+            context, "Text_"+ re.sub(
                 r'[^A-Za-z0-9_]', "", re.sub(r'\s', "", self.text)
-            )[:16]
-        )
-
-        # Copy render settings
-        text_scene.render.resolution_x = context.scene.render.resolution_x
-        text_scene.render.resolution_y = context.scene.render.resolution_y
-        text_scene.render.resolution_percentage = 100
-        text_scene.render.fps = context.scene.render.fps
-
-        # Output settings
-        text_scene.render.use_overwrite = True
-        text_scene.render.use_file_extension = False
-        text_scene.render.image_settings.file_format = 'PNG'
-        text_scene.render.filepath = path.join(
-            DEFAULT_DIR, text_scene.name[5:] +".png"
+            )[:16], self.text, self.bl_idname
         )
 
-        # Set edit screen for scene tools addon
-        if hasattr(text_scene, 'sf_scene_props'):
-            # Find first screen containing default
-            screen_found = False
-            for screen in bpy.data.screens:
-                if "default" in screen.name.lower():
-                    text_scene.sf_scene_props.edit_screen = screen.name
-                    screen_found = True
-                    break
-
-            # Find first screen containing 3d else
-            if not screen_found:
-                for screen in bpy.data.screens:
-                    if "3d" in screen.name.lower():
-                        text_scene.sf_scene_props.edit_screen = screen.name
-                        break
-
-        # Set up text scene
-        context.screen.scene = text_scene
-        text_scene.frame_start = text_scene.frame_end = 1
-        text_scene.render.alpha_mode = 'TRANSPARENT'
-        text_scene.world = bpy.data.worlds.new("Text")
-        text_scene.world.horizon_color = [0, 0, 0]
-
-        # Add camera
-        bpy.ops.object.camera_add()
-        text_scene.camera = text_scene.objects.active
-        text_scene.camera.location.z = text_scene.camera.data.lens / 16
-
-        # Add text
-        bpy.ops.object.text_add()
-        text_object = text_scene.objects.active
-        text_object.data.offset_y = -0.35
-        text_object.data.align_x = 'CENTER'
-        text_object.data.body = self.text
-
-        # Set up material
-        bpy.ops.object.material_slot_add()
-        text_material = bpy.data.materials.new("Text")
-        text_material.diffuse_color.r = 1
-        text_material.diffuse_color.g = 1
-        text_material.diffuse_color.b = 1
-        text_material.use_shadeless = True
-        text_object.material_slots[0].material = text_material
-
-        # Position text
-        text_object.scale.xyz = 0.3
-
-        # Switch back to sequencer scene
-        context.screen.scene = sequencer_scene
-
         # Add text scene strip
         bpy.ops.sequencer.scene_strip_add(
             scene=text_scene.name,
@@ -197,6 +410,10 @@ class TextSceneAddOperator(bpy.types.Operator):
         text_strip.name = text_scene.name
         text_strip.frame_final_duration = self.text_strip_duration
 
+        # Prerender title in automatic mode
+        if auto_prerender_enabled(context) and bpy.data.filepath != "":
+            refresh_title(context, text_strip)
+
         return {'FINISHED'}
 
 # Text scene button
@@ -207,6 +424,643 @@ def text_scene_button(self, context):
         icon='PLUGIN'
     )
 
+### Subtitles ###
+###################
+
+# Subtitle cue property group
+class SubtitleCue(bpy.types.PropertyGroup):
+    frame_start = bpy.props.IntProperty(name="Start")
+    frame_end = bpy.props.IntProperty(name="End")
+    body = bpy.props.StringProperty(name="Text")
+
+# Subtitle file patterns
+cue_time_re = re.compile(r'^\s*(\S+)\s*-->\s*(\S+)')
+timestamp_re = re.compile(r'^(?:(\d+):)?(\d+):(\d+)[,.](\d+)$')
+tag_re = re.compile(r'<[^>]*>')
+
+# Convert SRT or VTT timestamp to seconds
+def parse_timestamp(timestamp):
+    match = timestamp_re.match(timestamp)
+    if match is None:
+        raise ValueError("Invalid timestamp: "+ timestamp)
+    hours, minutes, seconds, fraction = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) \
+        + int(fraction) / 10 ** len(fraction)
+
+# Read cues of SRT or VTT file as (start, end, text) in seconds
+def read_cues(filepath):
+    with open(filepath, encoding='utf-8-sig', errors='replace') as file:
+        times = None
+        lines = []
+        for line in file:
+            line = line.rstrip("\r\n")
+
+            # Cue timing line
+            match = cue_time_re.match(line)
+            if match is not None:
+                times = (
+                    parse_timestamp(match.group(1)),
+                    parse_timestamp(match.group(2))
+                )
+                lines = []
+
+            # Blank line ending cue
+            elif line.strip() == "":
+                if times is not None:
+                    yield times + (tag_re.sub("", "\n".join(lines)),)
+                times = None
+
+            # Cue text, skipping numbers, headers and notes
+            elif times is not None:
+                lines.append(line)
+
+        # Last cue without trailing blank line
+        if times is not None:
+            yield times + (tag_re.sub("", "\n".join(lines)),)
+
+# Cue indices as (starts, ends, bodies) by scene name
+cue_indices = {}
+
+# Get sorted cue index of subtitle scene
+def get_cue_index(scene):
+    cue_index = cue_indices.get(scene.name)
+    if cue_index is None or len(cue_index[0]) != len(scene.sf_subtitle_cues):
+        cues = sorted(
+            (cue.frame_start, cue.frame_end, cue.body)
+            for cue in scene.sf_subtitle_cues
+        )
+        cue_index = cue_indices[scene.name] = (
+            [cue[0] for cue in cues],
+            [cue[1] for cue in cues],
+            [cue[2] for cue in cues]
+        )
+    return cue_index
+
+# Show cue of frame in subtitle scene
+def set_subtitle(scene, frame):
+    text_object = get_text_object(scene)
+    if text_object is None:
+        return
+
+    # Find last cue starting at or before frame
+    starts, ends, bodies = get_cue_index(scene)
+    i = bisect_right(starts, frame) - 1
+    body = bodies[i] if i >= 0 and frame < ends[i] else ""
+
+    # Change body only if changed
+    if text_object.data.body != body:
+        text_object.data.body = body
+
+# Subtitle strip names and strip count by sequencer scene name
+subtitle_strips = {}
+
+# Get names of subtitle scene strips in sequencer scene
+def get_subtitle_strips(scene):
+    strip_count = len(scene.sequence_editor.sequences_all)
+    cached = subtitle_strips.get(scene.name)
+    if cached is None or cached[1] != strip_count:
+        cached = subtitle_strips[scene.name] = ([
+            strip.name for strip in scene.sequence_editor.sequences_all
+            if strip.type == 'SCENE' and strip.scene is not None \
+            and len(strip.scene.sf_subtitle_cues) != 0
+        ], strip_count)
+    return cached[0]
+
+# Switch subtitles on frame change of subtitle or sequencer scene
+@persistent
+def update_subtitles(scene):
+    if len(scene.sf_subtitle_cues) != 0:
+        set_subtitle(scene, scene.frame_current)
+    elif scene.sequence_editor is not None:
+        for name in get_subtitle_strips(scene):
+            strip = scene.sequence_editor.sequences_all.get(name)
+            if strip is None or strip.scene is None:
+                continue
+            set_subtitle(
+                strip.scene,
+                scene.frame_current - strip.frame_start + strip.scene.frame_start
+            )
+
+# Clear subtitle caches
+@persistent
+def clear_subtitles(*args):
+    cue_indices.clear()
+    subtitle_strips.clear()
+
+# Import subtitles operator
+class SubtitleImportOperator(bpy.types.Operator):
+    # Meta data
+    bl_idname = "sf_addons.subtitle_import"
+    bl_label = "Import Subtitles"
+    bl_description = "Add SRT or VTT subtitles as one text scene strip"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Properties
+    filepath = bpy.props.StringProperty(subtype='FILE_PATH')
+    filter_glob = bpy.props.StringProperty(
+        default="*.srt;*.vtt", options={'HIDDEN'}
+    )
+
+    # Show only in sequence editor
+    @classmethod
+    def poll(cls, context):
+        return context.space_data.type == 'SEQUENCE_EDITOR'
+
+    # Show file browser
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    # Add subtitle scene strip
+    def execute(self, context):
+        # Read cues as frames
+        fps = context.scene.render.fps / context.scene.render.fps_base
+        try:
+            cues = [
+                (int(round(start * fps)) + 1, int(round(end * fps)) + 1, body)
+                for start, end, body in read_cues(self.filepath)
+            ]
+        except (OSError, ValueError) as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+        if len(cues) == 0:
+            self.report({'ERROR'}, "No subtitles found")
+            return {'CANCELLED'}
+
+        # Create text scene
+        name = re.sub(
+            r'[^A-Za-z0-9_]', "",
+            path.splitext(path.basename(self.filepath))[0]
+        )[:16]
+        subtitle_scene = create_text_scene(
+            context, "Subtitles_"+ name, "", self.bl_idname
+        )
+        subtitle_scene.frame_end = max(cue[1] for cue in cues)
+
+        # Store cues
+        for frame_start, frame_end, body in cues:
+            cue = subtitle_scene.sf_subtitle_cues.add()
+            cue.frame_start = frame_start
+            cue.frame_end = frame_end
+            cue.body = body
+
+        # Drop cue index of a removed scene with the same name
+        cue_indices.pop(subtitle_scene.name, None)
+
+        # Find lowest channel free over whole duration
+        se = context.scene.sequence_editor_create()
+        frame_start = context.scene.frame_current
+        frame_end = frame_start + subtitle_scene.frame_end
+        occupied = set(
+            strip.channel for strip in se.sequences
+            if strip.frame_final_start < frame_end \
+            and strip.frame_final_end > frame_start
+        )
+        channel = next((
+            channel for channel in range(1, MAX_CHANNEL + 1)
+            if channel not in occupied
+        ), None)
+        if channel is None:
+            self.report({'ERROR'}, "No free channel for subtitles")
+            return {'CANCELLED'}
+
+        # Add subtitle strip
+        subtitle_strip = se.sequences.new_scene(
+            subtitle_scene.name, subtitle_scene, channel, frame_start
+        )
+        subtitle_strip.blend_type = 'ALPHA_OVER'
+        for strip in context.selected_sequences or []:
+            strip.select = False
+        subtitle_strip.select = True
+        se.active_strip = subtitle_strip
+
+        self.report({'INFO'}, "Imported %d subtitles" % len(cues))
+        return {'FINISHED'}
+
+# Subtitle import button
+def subtitle_button(self, context):
+    self.layout.operator(
+        SubtitleImportOperator.bl_idname,
+        text="Subtitles",
+        icon='FONT_DATA'
+    )
+
+### Title cache ###
+#####################
+
+# Get content key of text scene
+def get_title_key(scene):
+    text_object = get_text_object(scene)
+    text = text_object.data
+    render = scene.render
+    values = [
+        text.body, text.font.filepath if text.font is not None else None,
+        text.size, text.align_x, text.offset_x, text.offset_y,
+        tuple(text_object.location), tuple(text_object.scale),
+        tuple(text_object.rotation_euler), render.resolution_x,
+        render.resolution_y, render.resolution_percentage,
+        render.pixel_aspect_x, render.pixel_aspect_y, render.alpha_mode
+    ]
+
+    # Colors
+    for slot in text_object.material_slots:
+        if slot.material is not None:
+            values.append(tuple(slot.material.diffuse_color))
+    if scene.world is not None:
+        values.append(tuple(scene.world.horizon_color))
+
+    # Camera
+    if scene.camera is not None:
+        values.append(tuple(scene.camera.location))
+        values.append(scene.camera.data.lens)
+
+    return hashlib.sha1(repr(values).encode()).hexdigest()
+
+# Title keys by text scene name
+title_keys = {}
+
+# Get title key, computed once until text scene data changes
+def get_cached_title_key(scene):
+    key = title_keys.get(scene.name)
+    if key is None:
+        key = title_keys[scene.name] = get_title_key(scene)
+    return key
+
+# Forget title keys when text scene data was edited
+@persistent
+def update_title_keys(scene):
+    if len(title_keys) != 0 and (
+        bpy.data.objects.is_updated or bpy.data.curves.is_updated \
+        or bpy.data.materials.is_updated or bpy.data.worlds.is_updated \
+        or bpy.data.cameras.is_updated or bpy.data.scenes.is_updated
+    ):
+        title_keys.clear()
+
+# Check if datablock has keyframes or drivers
+def is_animated(id_data):
+    anim = getattr(id_data, 'animation_data', None)
+    return anim is not None and (len(anim.drivers) != 0 or (
+        anim.action is not None and len(anim.action.fcurves) != 0
+    ))
+
+# Collect scene, world, objects, object data and materials of text scene
+def get_scene_datablocks(scene):
+    datablocks = [scene, scene.world]
+    for obj in scene.objects:
+        datablocks.extend((obj, obj.data))
+        for slot in obj.material_slots:
+            if slot.material is not None:
+                datablocks.append(slot.material)
+                datablocks.append(slot.material.node_tree)
+                datablocks.extend(
+                    texture_slot.texture
+                    for texture_slot in slot.material.texture_slots
+                    if texture_slot is not None
+                )
+    return [datablock for datablock in datablocks if datablock is not None]
+
+# Check if text scene looks the same on every frame
+def is_static_scene(scene):
+    if len(scene.sf_subtitle_cues) != 0:
+        return False
+    return not any(map(is_animated, get_scene_datablocks(scene)))
+
+# Check if text scene data was edited since the last scene update
+def is_scene_updated(scene):
+    return any(
+        datablock.is_updated or getattr(datablock, 'is_updated_data', False)
+        for datablock in get_scene_datablocks(scene)
+    )
+
+# Text scene names of held title image strips by (scene name, strip name)
+held_titles = {}
+
+# Rebuild held title registry
+@persistent
+def build_held_titles(*args):
+    held_titles.clear()
+    for scene in bpy.data.scenes:
+        if scene.sequence_editor is None:
+            continue
+        for strip in scene.sequence_editor.sequences_all:
+            if strip.type == 'IMAGE' and strip.get('sf_text_scene'):
+                held_titles[(scene.name, strip.name)] = strip['sf_text_scene']
+
+    # Restart watcher once a window is available
+    if len(held_titles) != 0 and not title_watcher['running'] \
+    and start_title_watcher not in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.append(start_title_watcher)
+
+# Held titles waiting to be shown as scene strips
+released_titles = set()
+
+# Running state of the title watcher
+title_watcher = {'running': False}
+
+# Queue held titles for release once their text scene got animated
+@persistent
+def release_animated_titles(scene):
+    if len(held_titles) == 0 or not (
+        bpy.data.actions.is_updated or bpy.data.objects.is_updated \
+        or bpy.data.materials.is_updated or bpy.data.curves.is_updated \
+        or bpy.data.worlds.is_updated or bpy.data.scenes.is_updated
+    ):
+        return
+
+    # Check each text scene of held titles once
+    released_scenes = set()
+    for text_scene_name in set(held_titles.values()):
+        text_scene = bpy.data.scenes.get(text_scene_name)
+        if text_scene is not None and is_scene_updated(text_scene) \
+        and not is_static_scene(text_scene):
+            released_scenes.add(text_scene_name)
+
+    # Queue their titles, strips are looked up by the watcher
+    if len(released_scenes) != 0:
+        released_titles.update(
+            title for title, text_scene_name in held_titles.items()
+            if text_scene_name in released_scenes
+        )
+
+# Swap queued titles outside of the scene update handler
+class TitleWatcherOperator(bpy.types.Operator):
+    # Meta data
+    bl_idname = "sf_addons.watch_titles"
+    bl_label = "Watch Held Titles"
+    bl_description = "Show held titles as scene strips once they get animated"
+    bl_options = {'INTERNAL'}
+
+    # Start watching
+    def invoke(self, context, event):
+        if title_watcher['running'] or context.window is None:
+            return {'CANCELLED'}
+        title_watcher['running'] = True
+        self.timer = context.window_manager.event_timer_add(
+            0.5, context.window
+        )
+        context.window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    # Swap queued titles on timer
+    def modal(self, context, event):
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        for scene_name, strip_name in list(released_titles):
+            released_titles.discard((scene_name, strip_name))
+            sequencer_scene = bpy.data.scenes.get(scene_name)
+            if (scene_name, strip_name) not in held_titles \
+            or sequencer_scene is None \
+            or sequencer_scene.sequence_editor is None:
+                continue
+            strip = sequencer_scene.sequence_editor.sequences_all.get(
+                strip_name
+            )
+
+            # Forget removed or renamed strips
+            if strip is None or get_strip_scene(strip) is None:
+                held_titles.pop((scene_name, strip_name), None)
+            else:
+                swap_to_scene(sequencer_scene, strip, get_strip_scene(strip))
+
+        # Stop when no title is held anymore
+        if len(held_titles) == 0:
+            self.cancel(context)
+            return {'FINISHED'}
+
+        return {'PASS_THROUGH'}
+
+    # Stop watching
+    def cancel(self, context):
+        context.window_manager.event_timer_remove(self.timer)
+        title_watcher['running'] = False
+
+# Start title watcher unless running
+def watch_titles():
+    if not title_watcher['running']:
+        bpy.ops.sf_addons.watch_titles('INVOKE_DEFAULT')
+
+# Reset watcher state of closed file
+@persistent
+def reset_title_watcher(*args):
+    title_watcher['running'] = False
+    released_titles.clear()
+
+# Start title watcher on first scene update with a window, then disarm
+@persistent
+def start_title_watcher(scene):
+    if bpy.context.window is None:
+        return
+    bpy.app.handlers.scene_update_post.remove(start_title_watcher)
+    if len(held_titles) != 0:
+        watch_titles()
+
+# Get absolute title image path of key
+def get_title_path(key):
+    return bpy.path.abspath(path.join(DEFAULT_DIR, key + ".png"))
+
+# Render text scene to title image unless cached
+def prerender_title(scene, filepath):
+    # Return on cache hit
+    if path.isfile(filepath):
+        return False
+
+    # Store output settings
+    render = scene.render
+    settings = (
+        render.filepath, render.use_file_extension,
+        render.image_settings.file_format, render.image_settings.color_mode
+    )
+
+    # Render still
+    render.filepath = filepath
+    render.use_file_extension = False
+    render.image_settings.file_format = 'PNG'
+    render.image_settings.color_mode = 'RGBA'
+    try:
+        bpy.ops.render.render(write_still=True, scene=scene.name)
+    finally:
+        # Restore output settings
+        render.filepath, render.use_file_extension, \
+            render.image_settings.file_format, \
+            render.image_settings.color_mode = settings
+
+    return True
+
+# Check if strip is not inside a meta strip, meta strips can't add strips
+def is_top_level(scene, strip):
+    return scene.sequence_editor.sequences.get(strip.name) == strip
+
+# Replace top level strip by new strip with same placement
+def replace_strip(scene, strip, add_strip):
+    if not is_top_level(scene, strip):
+        return None
+    sequences = scene.sequence_editor.sequences
+
+    # Store strip placement
+    name = strip.name
+    channel = strip.channel
+    frame_start = strip.frame_final_start
+    duration = strip.frame_final_duration
+    blend_type = strip.blend_type
+    blend_alpha = strip.blend_alpha
+    select = strip.select
+    active = scene.sequence_editor.active_strip == strip
+
+    # Remove strip
+    sequences.remove(strip)
+
+    # Add strip for the whole duration
+    new_strip = add_strip(sequences, name, channel, frame_start)
+    new_strip.frame_final_duration = duration
+
+    # Restore placement
+    new_strip.channel = channel
+    new_strip.blend_type = blend_type
+    new_strip.blend_alpha = blend_alpha
+    new_strip.select = select
+    if active:
+        scene.sequence_editor.active_strip = new_strip
+
+    return new_strip
+
+# Replace text scene strip with held title image strip
+def swap_to_title(scene, strip, text_scene, key):
+    image_strip = replace_strip(scene, strip,
+        lambda sequences, name, channel, frame_start: sequences.new_image(
+            name, get_title_path(key), channel, frame_start
+        )
+    )
+    if image_strip is None:
+        return None
+    image_strip.sf_text_scene = text_scene.name
+    image_strip.sf_title_key = key
+    held_titles[(scene.name, image_strip.name)] = text_scene.name
+    watch_titles()
+    return image_strip
+
+# Replace title image strip with text scene strip
+def swap_to_scene(scene, strip, text_scene):
+    held_titles.pop((scene.name, strip.name), None)
+    return replace_strip(scene, strip,
+        lambda sequences, name, channel, frame_start: sequences.new_scene(
+            name, text_scene, channel, frame_start
+        )
+    )
+
+# Point title image strip to new title image
+def update_title(strip, key):
+    filepath = get_title_path(key)
+    strip.directory = path.dirname(filepath) + os.sep
+    strip.elements[0].filename = path.basename(filepath)
+    strip.sf_title_key = key
+
+# Render static text strip if outdated and show title image
+def refresh_title(context, strip):
+    scene = get_strip_scene(strip)
+
+    # Show animated titles as scene strips
+    if not is_static_scene(scene):
+        if strip.type == 'IMAGE':
+            return swap_to_scene(context.scene, strip, scene) is not None
+        return False
+
+    key = get_title_key(scene)
+
+    # Skip up to date image strips
+    if strip.type == 'IMAGE' and strip.sf_title_key == key:
+        return False
+
+    # Skip scene strips inside meta strips before rendering
+    if strip.type == 'SCENE' and not is_top_level(context.scene, strip):
+        return False
+
+    # Render and swap
+    prerender_title(scene, get_title_path(key))
+    if strip.type == 'SCENE':
+        swap_to_title(context.scene, strip, scene, key)
+    else:
+        update_title(strip, key)
+
+    return True
+
+# Check if strip is text scene strip or title image strip
+def is_text_strip(strip):
+    if strip.type == 'SCENE':
+        scene = strip.scene
+    elif strip.type == 'IMAGE' and strip.get('sf_text_scene'):
+        scene = bpy.data.scenes.get(strip['sf_text_scene'])
+    else:
+        return False
+    return scene is not None and scene.name in text_scenes \
+        and get_text_object(scene) is not None
+
+# Check if automatic prerendering is enabled
+def auto_prerender_enabled(context):
+    addon = context.user_preferences.addons.get(__name__)
+    return addon is not None and addon.preferences.auto_prerender
+
+# Prerender text strips operator
+class PrerenderTextsOperator(bpy.types.Operator):
+    # Meta data
+    bl_idname = "sf_addons.prerender_text_strips"
+    bl_label = "Prerender Text Strips"
+    bl_description = "Render selected text strips once and show them as images"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Show only in sequence editor
+    @classmethod
+    def poll(cls, context):
+        return context.space_data.type == 'SEQUENCE_EDITOR' \
+            and context.scene.sequence_editor is not None
+
+    # Prerender stale strips
+    def execute(self, context):
+        # Require saved file for relative cache directory
+        if bpy.data.filepath == "":
+            self.report({'ERROR'}, "Save the file before prerendering")
+            return {'CANCELLED'}
+
+        # Refresh text strips, strips inside meta strips can't be swapped
+        strips = [
+            strip for strip in context.selected_sequences or []
+            if is_text_strip(strip) \
+            and len(get_strip_scene(strip).sf_subtitle_cues) == 0
+        ]
+        nested = [
+            strip for strip in strips
+            if not is_top_level(context.scene, strip)
+        ]
+        strips = [strip for strip in strips if strip not in nested]
+        animated = sum(
+            not is_static_scene(get_strip_scene(strip)) for strip in strips
+        )
+        refreshed = sum(refresh_title(context, strip) for strip in strips)
+
+        # Watch titles still held from before the file was opened
+        if len(held_titles) != 0:
+            watch_titles()
+
+        if len(nested) != 0:
+            self.report({'WARNING'}, "Updated %d text strips, %d animated, "
+                "skipped %d strips inside meta strips" % (
+                    refreshed, animated, len(nested)
+                )
+            )
+        else:
+            self.report({'INFO'}, "Updated %d text strips, %d animated" % (
+                refreshed, animated
+            ))
+        return {'FINISHED'}
+
+# Prerender button
+def prerender_button(self, context):
+    self.layout.operator(
+        PrerenderTextsOperator.bl_idname,
+        text="Prerender Text Strips",
+        icon='RENDER_STILL'
+    )
+
 ### Rendered text strip panel ###
 #################################
 
@@ -222,23 +1076,15 @@ class TextStripPanel(bpy.types.Panel):
     def poll(self, context):
         if context.scene.sequence_editor is None: return False
         strip = context.scene.sequence_editor.active_strip
-        return (
-            strip is not None \
-            and strip.type == 'SCENE' \
-            and strip.scene is not None \
-            and sum(o.type == 'FONT' for o in strip.scene.objects) > 0
-        )
+        return strip is not None and is_text_strip(strip)
 
     # Draw panel
     def draw(self, context):
         strip = context.scene.sequence_editor.active_strip
-
-        text_objects = list(filter(
-            lambda o: o.type == 'FONT', strip.scene.objects
-        ))
+        text_scene = get_strip_scene(strip)
 
         # Text
-        text_object = text_objects[0]
+        text_object = get_text_object(text_scene)
         self.layout.prop(text_object.data, "body", text="")
 
         # Positioning
@@ -250,12 +1096,46 @@ class TextStripPanel(bpy.types.Panel):
             text_object.material_slots[0].material is not None:
             material = text_object.material_slots[0].material
 
-            # Color row
+            # Color row, copying shared colors on edit
             color_row = self.layout.row()
-            color_row.prop(material, "diffuse_color", text="")
-            if strip.scene.world is not None:
-                color_row.prop(strip.scene.render, "alpha_mode", text="")
-                color_row.prop(strip.scene.world, "horizon_color", text="")
+            color_row.prop(strip, "sf_text_color", text="")
+            if text_scene.world is not None:
+                color_row.prop(text_scene.render, "alpha_mode", text="")
+                color_row.prop(strip, "sf_text_background", text="")
+
+            # Colors shared with other text strips
+            if material.users > 1 or (
+                text_scene.world is not None and text_scene.world.users > 1
+            ):
+                self.layout.operator(
+                    TextSingleUserOperator.bl_idname, icon='LINKED'
+                )
+
+        # Title image state
+        if strip.type == 'IMAGE':
+            if strip.sf_title_key != get_cached_title_key(text_scene) \
+            or (context.scene.name, strip.name) in released_titles:
+                self.layout.operator(
+                    PrerenderTextsOperator.bl_idname, text="Update Title",
+                    icon='ERROR'
+                )
+
+### Add-on preferences ###
+############################
+
+# Text preferences
+class TextPreferences(bpy.types.AddonPreferences):
+    bl_idname = __name__
+
+    # Automatic prerendering property
+    auto_prerender = bpy.props.BoolProperty(
+        name="Prerender Text Strips", default=False,
+        description="Render new text strips once and show them as images"
+    )
+
+    # Draw preferences
+    def draw(self, context):
+        self.layout.prop(self, 'auto_prerender')
 
 ### Module registration ###
 ###########################AA
@@ -265,24 +1145,96 @@ def register():
     # Register module
     bpy.utils.register_module(__name__)
 
-    # Register strip properties
+    # Register properties
     bpy.types.SceneSequence.sf_text_location = text_location
     bpy.types.SceneSequence.sf_text_scale = text_scale
+    bpy.types.SceneSequence.sf_text_color = text_color
+    bpy.types.SceneSequence.sf_text_background = background_color
+    bpy.types.ImageSequence.sf_text_location = text_location
+    bpy.types.ImageSequence.sf_text_scale = text_scale
+    bpy.types.ImageSequence.sf_text_color = text_color
+    bpy.types.ImageSequence.sf_text_background = background_color
+    bpy.types.ImageSequence.sf_text_scene = bpy.props.StringProperty(
+        name="Text Scene", default=""
+    )
+    bpy.types.ImageSequence.sf_title_key = bpy.props.StringProperty(
+        name="Title Key", default=""
+    )
+    bpy.types.Scene.sf_is_text_scene = bpy.props.BoolProperty(
+        name="Is Text Scene", default=False
+    )
+    bpy.types.Scene.sf_subtitle_cues = bpy.props.CollectionProperty(
+        type=SubtitleCue
+    )
+
+    # Add handlers
+    bpy.app.handlers.load_post.append(clear_text_objects)
+    bpy.app.handlers.undo_post.append(clear_text_objects)
+    bpy.app.handlers.redo_post.append(clear_text_objects)
+    bpy.app.handlers.load_post.append(build_text_scenes)
+    bpy.app.handlers.undo_post.append(build_text_scenes)
+    bpy.app.handlers.redo_post.append(build_text_scenes)
+    bpy.app.handlers.scene_update_post.append(update_text_scenes)
+    bpy.app.handlers.load_post.append(clear_subtitles)
+    bpy.app.handlers.undo_post.append(clear_subtitles)
+    bpy.app.handlers.redo_post.append(clear_subtitles)
+    bpy.app.handlers.frame_change_pre.append(update_subtitles)
+    bpy.app.handlers.load_post.append(build_held_titles)
+    bpy.app.handlers.undo_post.append(build_held_titles)
+    bpy.app.handlers.redo_post.append(build_held_titles)
+    bpy.app.handlers.scene_update_post.append(release_animated_titles)
+    bpy.app.handlers.load_pre.append(reset_title_watcher)
+    bpy.app.handlers.scene_update_post.append(update_title_keys)
 
-    # Add button
+    # Add buttons
     bpy.types.SEQUENCER_MT_add_effect.append(text_scene_button)
+    bpy.types.SEQUENCER_MT_add.append(subtitle_button)
+    bpy.types.SEQUENCER_MT_strip.append(prerender_button)
 
 # Unregister module
 def unregister():
     # Unregister module
     bpy.utils.unregister_module(__name__)
 
-    # Unregister strip properties
+    # Unregister properties
     del bpy.types.SceneSequence.sf_text_location
     del bpy.types.SceneSequence.sf_text_scale
+    del bpy.types.SceneSequence.sf_text_color
+    del bpy.types.SceneSequence.sf_text_background
+    del bpy.types.ImageSequence.sf_text_location
+    del bpy.types.ImageSequence.sf_text_scale
+    del bpy.types.ImageSequence.sf_text_color
+    del bpy.types.ImageSequence.sf_text_background
+    del bpy.types.ImageSequence.sf_text_scene
+    del bpy.types.ImageSequence.sf_title_key
+    del bpy.types.Scene.sf_is_text_scene
+    del bpy.types.Scene.sf_subtitle_cues
+
+    # Remove handlers
+    bpy.app.handlers.load_post.remove(clear_text_objects)
+    bpy.app.handlers.undo_post.remove(clear_text_objects)
+    bpy.app.handlers.redo_post.remove(clear_text_objects)
+    bpy.app.handlers.load_post.remove(build_text_scenes)
+    bpy.app.handlers.undo_post.remove(build_text_scenes)
+    bpy.app.handlers.redo_post.remove(build_text_scenes)
+    bpy.app.handlers.scene_update_post.remove(update_text_scenes)
+    bpy.app.handlers.load_post.remove(clear_subtitles)
+    bpy.app.handlers.undo_post.remove(clear_subtitles)
+    bpy.app.handlers.redo_post.remove(clear_subtitles)
+    bpy.app.handlers.frame_change_pre.remove(update_subtitles)
+    bpy.app.handlers.load_post.remove(build_held_titles)
+    bpy.app.handlers.undo_post.remove(build_held_titles)
+    bpy.app.handlers.redo_post.remove(build_held_titles)
+    bpy.app.handlers.scene_update_post.remove(release_animated_titles)
+    bpy.app.handlers.load_pre.remove(reset_title_watcher)
+    if start_title_watcher in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.remove(start_title_watcher)
+    bpy.app.handlers.scene_update_post.remove(update_title_keys)
 
-    # Remove button
+    # Remove buttons
     bpy.types.SEQUENCER_MT_add_effect.remove(text_scene_button)
+    bpy.types.SEQUENCER_MT_add.remove(subtitle_button)
+    bpy.types.SEQUENCER_MT_strip.remove(prerender_button)
 
 # Register if executed as script
 if __name__ == '__main__':
@@ -11,13 +11,38 @@ bl_info = {
 import bpy
 import bgl
 import blf
+import os
+import json
+import hashlib
+import tempfile
+import time
+import threading
+import subprocess
 from mathutils import *
 from math import *
+from bisect import bisect_left
+from collections import OrderedDict
 from bpy_extras import view3d_utils
 from bpy_extras import image_utils
+from bpy.app.handlers import persistent
+try:
+    import numpy
+except ImportError:
+    numpy = None
 from bpy.props import BoolProperty, IntProperty, FloatProperty, IntVectorProperty, StringProperty, CollectionProperty
 
 ######################################  add transform channel #############################################################################
+def channel_is_free(channels, channel, start, end):
+    starts, ends = channels.get(channel, ([], []))
+    i = bisect_left(starts, end)
+    return i == 0 or ends[i-1] <= start
+
+def channel_add(channels, channel, start, end):
+    starts, ends = channels.setdefault(channel, ([], []))
+    i = bisect_left(starts, start)
+    starts.insert(i, start)
+    ends.insert(i, end)
+
 class TF_Add_Transform(bpy.types.Operator):
     bl_idname = "sequencer.tf_add_transform"
     bl_label = "Add Transform Effect"
@@ -30,23 +55,34 @@ class TF_Add_Transform(bpy.types.Operator):
         return ret and context.space_data.type == 'SEQUENCE_EDITOR'
                 
     def execute(self, context):   
-        selection = [seq for seq in context.scene.sequence_editor.sequences if seq.select and seq.type not in ['SOUND','TRANSFORM']]
+        invalidate_hit_index()
+        sequences = context.scene.sequence_editor.sequences
+        selection = [seq for seq in sequences if seq.select and seq.type not in ['SOUND','TRANSFORM']]
         
         fc = context.scene.frame_current
         lower = 1000
         
         lower_seq = -1
-        for seq in context.scene.sequence_editor.sequences:
+        channels = {}
+        for seq in sequences:
+            channel_add(channels, seq.channel, seq.frame_final_start, seq.frame_final_end)
             if seq.channel < lower and seq.frame_start <= fc and (seq.frame_start + seq.frame_final_duration) >= fc:
                 lower = seq.channel
                 lower_seq = seq
-                
-        for seq in selection:            
-            bpy.ops.sequencer.select_all(action='DESELECT')
-            context.scene.sequence_editor.active_strip = seq
-            bpy.ops.sequencer.effect_strip_add(type = "TRANSFORM")
-            active_seq = context.scene.sequence_editor.active_strip
-            active_seq.name = "[TR]-%s" % seq.name
+        
+        for seq in sequences:
+            seq.select = False
+        
+        transforms = []
+        for seq in selection:
+            start, end = seq.frame_final_start, seq.frame_final_end
+            channel = seq.channel + 1
+            while channel < 32 and not channel_is_free(channels, channel, start, end):
+                channel += 1
+            channel_add(channels, channel, start, end)
+            
+            active_seq = sequences.new_effect("[TR]-%s" % seq.name, 'TRANSFORM', channel, start, seq1 = seq)
+            transforms.append(active_seq)
             seq.mute = True           
             active_seq.blend_alpha = seq.blend_alpha
             
@@ -79,9 +115,73 @@ class TF_Add_Transform(bpy.types.Operator):
                     seq.use_translation = False
                 else:
                     crop_scale(active_seq,1)
+        
+        for active_seq in transforms:
+            active_seq.select = True
+        if transforms:
+            context.scene.sequence_editor.active_strip = transforms[-1]
                                                            
         return {'FINISHED'}
 
+######################################  Coalesced property writes    ####################################################
+write_interval = 1/60
+
+class TF_Write_Queue():
+    def __init__(self):
+        self.pending = OrderedDict()
+        self.last_flush = 0
+        
+    def set(self, seq, attr, value):
+        self.pending[(seq.name, attr)] = (seq, attr, value)
+        
+    def clear(self):
+        self.pending.clear()
+        
+    def flush(self, force = False):
+        now = time.perf_counter()
+        if not self.pending or (not force and now - self.last_flush < write_interval):
+            return
+        for seq, attr, value in self.pending.values():
+            if abs(getattr(seq, attr) - value) > 1e-6 * max(1.0, abs(value)):
+                setattr(seq, attr, value)
+        self.pending.clear()
+        self.last_flush = now
+
+######################################  Interaction preview quality    ####################################################
+proxy_sizes = ['25', '50', '75', '100', 'FULL']
+preview_restore = {'space' : None, 'proxy' : None}
+
+def lower_preview(context):
+    if preview_restore['space'] is not None or context.scene.tf_preview_quality != 'PROXY':
+        return
+    space = context.space_data
+    size = space.proxy_render_size
+    #only the proxy size changes, the scene render settings are never touched
+    #going from the scene size to a proxy size only keeps get_fac() when the scene renders at 100%
+    if size == 'SCENE' and context.scene.render.resolution_percentage != 100:
+        return
+    if size != 'SCENE' and (size not in proxy_sizes or proxy_sizes.index(size) <= proxy_sizes.index(context.scene.tf_preview_proxy)):
+        return
+    preview_restore['space'] = space
+    preview_restore['proxy'] = size
+    space.proxy_render_size = context.scene.tf_preview_proxy
+
+@persistent
+def restore_preview(*args):
+    if preview_restore['space'] is not None:
+        preview_restore['space'].proxy_render_size = preview_restore['proxy']
+    preview_restore['space'] = preview_restore['proxy'] = None
+
+def restore_on_error(modal):
+    def wrapper(self, context, event):
+        try:
+            return modal(self, context, event)
+        except:
+            restore_preview()
+            invalidate_hit_index()
+            raise
+    return wrapper
+
 ######################################  Draw code for ratote scale    ####################################################
 def draw_callback_px_point(self, context):
     bgl.glEnable(bgl.GL_BLEND)
@@ -279,7 +379,15 @@ class TF_Scale(bpy.types.Operator):
                     ret = True
         return ret and context.space_data.type == 'SEQUENCE_EDITOR' and context.region.type == 'PREVIEW'
 
+    @restore_on_error
     def modal(self, context, event):
+        #the timer only flushes queued writes
+        if event.type == 'TIMER' and self.tab:
+            if self.writes.pending:
+                self.writes.flush()
+                context.area.tag_redraw()
+            return {'RUNNING_MODAL'}
+        
         context.area.tag_redraw()
         
         if self.tab:
@@ -311,22 +419,26 @@ class TF_Scale(bpy.types.Operator):
                 context.area.header_text_set("Scale X:%.4f Y: %.4f" % (info_x, info_y))#
                
             for seq, init_s, init_t in zip(self.tab, self.tab_init, self.tab_init_t):
-                seq.scale_start_x =  init_s[0] * round(diff_x, precision)
-                seq.scale_start_y =  init_s[1] * round(diff_y, precision)
+                self.writes.set(seq, 'scale_start_x', init_s[0] * round(diff_x, precision))
+                self.writes.set(seq, 'scale_start_y', init_s[1] * round(diff_y, precision))
                 
                 sign_x = -1 if seq.use_flip_x else 1
                 sign_y = -1 if seq.use_flip_y else 1
                 if context.scene.seq_pivot_type in ['0','3']:
-                    seq.translate_start_x = set_pos_x(seq, (init_t[0] - sign_x*self.center_real.x) * round(diff_x, precision) + sign_x*self.center_real.x)
-                    seq.translate_start_y = set_pos_y(seq, (init_t[1] - sign_y*self.center_real.y) * round(diff_y, precision) + sign_y*self.center_real.y)
+                    self.writes.set(seq, 'translate_start_x', set_pos_x(seq, (init_t[0] - sign_x*self.center_real.x) * round(diff_x, precision) + sign_x*self.center_real.x))
+                    self.writes.set(seq, 'translate_start_y', set_pos_y(seq, (init_t[1] - sign_y*self.center_real.y) * round(diff_y, precision) + sign_y*self.center_real.y))
                 
                 if context.scene.seq_pivot_type == '2':                    
                     fac = get_fac() 
                     center_c2d = Vector((sign_x*context.scene.seq_cursor2d_loc[0],sign_y*context.scene.seq_cursor2d_loc[1]))/fac                    
-                    seq.translate_start_x = set_pos_x(seq, (init_t[0] - center_c2d.x) * round(diff_x, precision) + center_c2d.x)
-                    seq.translate_start_y = set_pos_y(seq, (init_t[1] - center_c2d.y) * round(diff_y, precision) + center_c2d.y)
+                    self.writes.set(seq, 'translate_start_x', set_pos_x(seq, (init_t[0] - center_c2d.x) * round(diff_x, precision) + center_c2d.x))
+                    self.writes.set(seq, 'translate_start_y', set_pos_y(seq, (init_t[1] - center_c2d.y) * round(diff_y, precision) + center_c2d.y))
                     
         if event.type == 'LEFTMOUSE' or event.type == 'RET' or event.type == 'NUMPAD_ENTER' or not self.tab:           
+            self.writes.flush(True)
+            context.window_manager.event_timer_remove(self._timer)
+            restore_preview()
+            invalidate_hit_index()
             bpy.types.SpaceSequenceEditor.draw_handler_remove(self._handle_line, 'PREVIEW')
             if self._handle_axes:
                 bpy.types.SpaceSequenceEditor.draw_handler_remove(self._handle_axes, 'PREVIEW')
@@ -334,6 +446,10 @@ class TF_Scale(bpy.types.Operator):
             return {'FINISHED'}
               
         if event.type == 'ESC' or event.type == 'RIGHTMOUSE':
+            self.writes.clear()
+            context.window_manager.event_timer_remove(self._timer)
+            restore_preview()
+            invalidate_hit_index()
             for seq, init_s, init_t in zip(self.tab, self.tab_init, self.tab_init_t):
                 seq.scale_start_x = init_s[0]
                 seq.scale_start_y = init_s[1]
@@ -346,9 +462,22 @@ class TF_Scale(bpy.types.Operator):
             context.area.header_text_set()
             return {'FINISHED'}
         
+        self.writes.flush()
         return {'RUNNING_MODAL'}
                 
+    def cancel(self, context):
+        self.writes.clear()
+        context.window_manager.event_timer_remove(self._timer)
+        restore_preview()
+        invalidate_hit_index()
+        bpy.types.SpaceSequenceEditor.draw_handler_remove(self._handle_line, 'PREVIEW')
+        if self._handle_axes:
+            bpy.types.SpaceSequenceEditor.draw_handler_remove(self._handle_axes, 'PREVIEW')
+        if context.area:
+            context.area.header_text_set()
+        
     def invoke(self, context, event):         
+        invalidate_hit_index()
         
         if event.alt :
             for seq in context.scene.sequence_editor.sequences:
@@ -360,6 +489,7 @@ class TF_Scale(bpy.types.Operator):
                         seq.scale_start_y = 1
             ret = 'FINISHED'
         else:  
+            lower_preview(context)
             fac = get_fac() 
             self.tab_init = []
             self.tab_init_t = []
@@ -397,6 +527,8 @@ class TF_Scale(bpy.types.Operator):
                 
             args = (self, context)
             self._handle_line = bpy.types.SpaceSequenceEditor.draw_handler_add(draw_callback_px_point, args, 'PREVIEW', 'POST_PIXEL')
+            self.writes = TF_Write_Queue()
+            self._timer = context.window_manager.event_timer_add(write_interval, context.window)
             context.window_manager.modal_handler_add(self)
             ret = 'RUNNING_MODAL'                           
         return {ret}
@@ -429,7 +561,15 @@ class TF_Rotation(bpy.types.Operator):
                     ret = True
         return ret and context.space_data.type == 'SEQUENCE_EDITOR' and context.region.type == 'PREVIEW'
 
+    @restore_on_error
     def modal(self, context, event):
+        #the timer only flushes queued writes
+        if event.type == 'TIMER' and self.tab:
+            if self.writes.pending:
+                self.writes.flush()
+                context.area.tag_redraw()
+            return {'RUNNING_MODAL'}
+        
         context.area.tag_redraw()
                 
         if self.tab:
@@ -451,29 +591,37 @@ class TF_Rotation(bpy.types.Operator):
                 sign_x = -1 if seq.use_flip_x else 1
                 sign_y = -1 if seq.use_flip_y else 1      
                 
-                seq.rotation_start = init_rot + sign_x*sign_y*rot
+                self.writes.set(seq, 'rotation_start', init_rot + sign_x*sign_y*rot)
                 
                 if context.scene.seq_pivot_type in ['0','3']:                    
                     np = rotate_point(Vector((init_t[0], init_t[1])) - Vector((sign_x*self.center_real.x,sign_y*self.center_real.y)), sign_x*sign_y*radians(rot))
-                    seq.translate_start_x = set_pos_x(seq, np.x + sign_x*self.center_real.x)
-                    seq.translate_start_y = set_pos_y(seq, np.y + sign_y*self.center_real.y)
+                    self.writes.set(seq, 'translate_start_x', set_pos_x(seq, np.x + sign_x*self.center_real.x))
+                    self.writes.set(seq, 'translate_start_y', set_pos_y(seq, np.y + sign_y*self.center_real.y))
                 
                 if context.scene.seq_pivot_type == '2':                    
                     fac = get_fac()
                     center_c2d = Vector((sign_x*context.scene.seq_cursor2d_loc[0],sign_y*context.scene.seq_cursor2d_loc[1]))/fac                    
                     np = rotate_point(Vector((init_t[0], init_t[1])) - center_c2d, sign_x*sign_y*radians(rot))
-                    seq.translate_start_x = set_pos_x(seq, np.x + center_c2d.x)
-                    seq.translate_start_y = set_pos_y(seq, np.y + center_c2d.y) 
+                    self.writes.set(seq, 'translate_start_x', set_pos_x(seq, np.x + center_c2d.x))
+                    self.writes.set(seq, 'translate_start_y', set_pos_y(seq, np.y + center_c2d.y))
                     
             info_rot = (rot)
             context.area.header_text_set("Rotation %.4f " % info_rot)
                         
         if event.type == 'LEFTMOUSE' or event.type == 'RET' or event.type == 'NUMPAD_ENTER' or not self.tab:
+            self.writes.flush(True)
+            context.window_manager.event_timer_remove(self._timer)
+            restore_preview()
+            invalidate_hit_index()
             bpy.types.SpaceSequenceEditor.draw_handler_remove(self._handle_line, 'PREVIEW')
             context.area.header_text_set()
             return {'FINISHED'}
         
         if event.type == 'ESC' or event.type == 'RIGHTMOUSE':
+            self.writes.clear()
+            context.window_manager.event_timer_remove(self._timer)
+            restore_preview()
+            invalidate_hit_index()
             for seq, init_rot, init_t in zip(self.tab, self.tab_init, self.tab_init_t):
                 seq.rotation_start = init_rot
                 seq.translate_start_x = set_pos_x(seq, init_t[0])
@@ -482,9 +630,20 @@ class TF_Rotation(bpy.types.Operator):
             context.area.header_text_set()
             return {'FINISHED'}
         
+        self.writes.flush()
         return {'RUNNING_MODAL'}
                 
+    def cancel(self, context):
+        self.writes.clear()
+        context.window_manager.event_timer_remove(self._timer)
+        restore_preview()
+        invalidate_hit_index()
+        bpy.types.SpaceSequenceEditor.draw_handler_remove(self._handle_line, 'PREVIEW')
+        if context.area:
+            context.area.header_text_set()
+        
     def invoke(self, context, event):   
+        invalidate_hit_index()
         
         
         if event.alt :
@@ -494,6 +653,7 @@ class TF_Rotation(bpy.types.Operator):
             ret = 'FINISHED'
         else:
             
+            lower_preview(context)
             fac = get_fac()
             self.tab_init = []
             self.tab = []
@@ -531,6 +691,8 @@ class TF_Rotation(bpy.types.Operator):
                 self.vec_init = Vector((event.mouse_region_x, event.mouse_region_y)) - self.center_area
             args = (self, context)
             self._handle_line = bpy.types.SpaceSequenceEditor.draw_handler_add(draw_callback_px_point, args, 'PREVIEW', 'POST_PIXEL')
+            self.writes = TF_Write_Queue()
+            self._timer = context.window_manager.event_timer_add(write_interval, context.window)
             context.window_manager.modal_handler_add(self)
             ret = 'RUNNING_MODAL'    
                         
@@ -577,7 +739,15 @@ class TF_Position(bpy.types.Operator):
                     ret = True
         return ret and context.space_data.type == 'SEQUENCE_EDITOR' and context.region.type == 'PREVIEW'
 
+    @restore_on_error
     def modal(self, context, event):
+        #the timer only flushes queued writes
+        if event.type == 'TIMER' and self.tab:
+            if self.writes.pending:
+                self.writes.flush()
+                context.area.tag_redraw()
+            return {'RUNNING_MODAL'}
+        
         if self.tab:                                   
             self.pos_mouse = Vector((event.mouse_region_x,event.mouse_region_y))
             self.vec_act = self.pos_mouse  - self.center_area
@@ -614,16 +784,24 @@ class TF_Position(bpy.types.Operator):
                     if seq.use_flip_y:
                         sign_y = -1 
                               
-                    seq.translate_start_x = set_pos_x(seq, init_g[0] + round(sign_x*vec_act_fm.x * view_zoom_preview(), precision))            
-                    seq.translate_start_y = set_pos_y(seq, init_g[1] + round(sign_y*vec_act_fm.y * view_zoom_preview(), precision)) 
+                    self.writes.set(seq, 'translate_start_x', set_pos_x(seq, init_g[0] + round(sign_x*vec_act_fm.x * view_zoom_preview(), precision)))
+                    self.writes.set(seq, 'translate_start_y', set_pos_y(seq, init_g[1] + round(sign_y*vec_act_fm.y * view_zoom_preview(), precision)))
                     
         if event.type == 'LEFTMOUSE' or event.type == 'RET' or event.type == 'NUMPAD_ENTER' or not self.tab:
+            self.writes.flush(True)
+            context.window_manager.event_timer_remove(self._timer)
+            restore_preview()
+            invalidate_hit_index()
             if self._handle_axes:
                 bpy.types.SpaceSequenceEditor.draw_handler_remove(self._handle_axes, 'PREVIEW')
             context.area.header_text_set()
             return {'FINISHED'}
         
         if event.type == 'ESC' or event.type == 'RIGHTMOUSE':
+            self.writes.clear()
+            context.window_manager.event_timer_remove(self._timer)
+            restore_preview()
+            invalidate_hit_index()
             if self._handle_axes:
                 bpy.types.SpaceSequenceEditor.draw_handler_remove(self._handle_axes, 'PREVIEW')
             context.area.header_text_set()
@@ -632,9 +810,21 @@ class TF_Position(bpy.types.Operator):
                 seq.translate_start_y = set_pos_y(seq, init_g[1])
             return {'FINISHED'}
         
+        self.writes.flush()
         return {'RUNNING_MODAL'}
                 
+    def cancel(self, context):
+        self.writes.clear()
+        context.window_manager.event_timer_remove(self._timer)
+        restore_preview()
+        invalidate_hit_index()
+        if self._handle_axes:
+            bpy.types.SpaceSequenceEditor.draw_handler_remove(self._handle_axes, 'PREVIEW')
+        if context.area:
+            context.area.header_text_set()
+        
     def invoke(self, context, event):   
+        invalidate_hit_index()
               
         if event.alt :
             for seq in context.scene.sequence_editor.sequences:
@@ -643,6 +833,7 @@ class TF_Position(bpy.types.Operator):
                     seq.translate_start_y = 0
             ret = 'FINISHED'
         else:    
+            lower_preview(context)
             self.first_mouse.x = event.mouse_region_x
             self.first_mouse.y = event.mouse_region_y            
             self.key_val = '+0'
@@ -663,6 +854,8 @@ class TF_Position(bpy.types.Operator):
             if self.tab:
                 self.center_area /= x           
                 self.center_area = Vector(context.region.view2d.view_to_region(self.center_area.x*fac, self.center_area.y*fac,clip=False))  
+            self.writes = TF_Write_Queue()
+            self._timer = context.window_manager.event_timer_add(write_interval, context.window)
             context.window_manager.modal_handler_add(self)
             ret = 'RUNNING_MODAL'    
         
@@ -693,7 +886,7 @@ def set_pos_y(seq,pos):
     return pos 
 
 def get_fac():
-    if bpy.context.space_data.proxy_render_size == 'SCENE':
+    if getattr(bpy.context.space_data, 'proxy_render_size', 'SCENE') == 'SCENE':
         fac = bpy.context.scene.render.resolution_percentage/100
     else:
         fac = 1    
@@ -776,6 +969,13 @@ class TF_Alpha(bpy.types.Operator):
         return ret and context.space_data.type == 'SEQUENCE_EDITOR' and context.region.type == 'PREVIEW'
         
     def modal(self, context, event):
+        #the timer only flushes queued writes
+        if event.type == 'TIMER':
+            if self.writes.pending:
+                self.writes.flush()
+                context.area.tag_redraw()
+            return {'RUNNING_MODAL'}
+        
         context.area.tag_redraw()
         w = context.region.width
         self.pos = Vector((event.mouse_region_x + self.alpha_init * w/5,event.mouse_region_y)) - self.first_mouse
@@ -793,19 +993,29 @@ class TF_Alpha(bpy.types.Operator):
         precision = 1 if event.ctrl else 3
         
         self.fac = round(self.fac,precision)    
-        context.scene.sequence_editor.active_strip.blend_alpha = self.fac    
+        self.writes.set(context.scene.sequence_editor.active_strip, 'blend_alpha', self.fac)
         
         if event.type == 'LEFTMOUSE' or event.type == 'RET' or event.type == 'NUMPAD_ENTER':
+            self.writes.flush(True)
+            context.window_manager.event_timer_remove(self._timer)
             bpy.types.SpaceSequenceEditor.draw_handler_remove(self._handle_alpha, 'PREVIEW')                
             return {'FINISHED'}
         
         if event.type == 'ESC' or event.type == 'RIGHTMOUSE':
+            self.writes.clear()
+            context.window_manager.event_timer_remove(self._timer)
             context.scene.sequence_editor.active_strip.blend_alpha = self.alpha_init
             bpy.types.SpaceSequenceEditor.draw_handler_remove(self._handle_alpha, 'PREVIEW')                
             return {'FINISHED'}
          
+        self.writes.flush()
         return {'RUNNING_MODAL'}   
                 
+    def cancel(self, context):
+        self.writes.clear()
+        context.window_manager.event_timer_remove(self._timer)
+        bpy.types.SpaceSequenceEditor.draw_handler_remove(self._handle_alpha, 'PREVIEW')
+                
     def invoke(self, context, event): 
         if event.alt :
             for seq in context.scene.sequence_editor.sequences:
@@ -819,6 +1029,8 @@ class TF_Alpha(bpy.types.Operator):
             
             args = (self, context)
             self._handle_alpha = bpy.types.SpaceSequenceEditor.draw_handler_add(draw_callback_px_alpha, args, 'PREVIEW', 'POST_PIXEL')       
+            self.writes = TF_Write_Queue()
+            self._timer = context.window_manager.event_timer_add(write_interval, context.window)
             context.window_manager.modal_handler_add(self)
             ret = 'RUNNING_MODAL'
                
@@ -863,10 +1075,15 @@ def draw_callback_px_crop(self, context):
     bgl.glEnable(bgl.GL_DEPTH_TEST)
     
     #Texture    
-    texture1 = self.img.bindcode
-    bgl.glBindTexture(bgl.GL_TEXTURE_2D, texture1);
-    bgl.glTexParameteri(bgl.GL_TEXTURE_2D, bgl.GL_TEXTURE_MAG_FILTER, bgl.GL_LINEAR)
-    bgl.glTexParameteri(bgl.GL_TEXTURE_2D, bgl.GL_TEXTURE_MIN_FILTER, bgl.GL_LINEAR)        
+    if self.img is not None:
+        texture1 = self.img.bindcode
+        bgl.glBindTexture(bgl.GL_TEXTURE_2D, texture1);
+        bgl.glTexParameteri(bgl.GL_TEXTURE_2D, bgl.GL_TEXTURE_MAG_FILTER, bgl.GL_LINEAR)
+        bgl.glTexParameteri(bgl.GL_TEXTURE_2D, bgl.GL_TEXTURE_MIN_FILTER, bgl.GL_LINEAR)        
+    else:
+        #Placeholder while loading
+        bgl.glDisable(bgl.GL_TEXTURE_2D)
+        bgl.glColor4f(0.3, 0.3, 0.3, 1.0)
     
     bgl.glPushMatrix() 
     bgl.glTranslatef(origine[0],origine[1],0)               
@@ -923,12 +1140,286 @@ def draw_callback_px_crop(self, context):
     bgl.glDisable(bgl.GL_BLEND)
     bgl.glColor4f(0.0, 0.0, 0.0, 1.0)
 
+######################################   Thumbnail cache ########################################
+thumbnail_levels = [128, 256, 512, 1024]
+thumbnail_max_frames = 250
+thumbnail_cache_size = 256*1024*1024
+thumbnail_worker = {'process' : None, 'queued' : set()}
+
+def thumbnail_dir():
+    return bpy.utils.user_resource('DATAFILES', path = "sf_thumbnails", create = True)
+
+def thumbnail_base(filepath, frame):
+    filepath = bpy.path.abspath(filepath)
+    try:
+        mtime = os.path.getmtime(filepath)
+    except OSError:
+        return None
+    return hashlib.sha1(repr((os.path.normpath(filepath), mtime, frame)).encode()).hexdigest()
+
+def thumbnail_file(base, level, directory = None):
+    return os.path.join(directory or thumbnail_dir(), "%s_%d.png" % (base, level))
+
+def thumbnail_level(width):
+    for level in thumbnail_levels:
+        if level >= width:
+            return level
+    return None
+
+def preview_key(key, width, orig_width):
+    level = thumbnail_level(width)
+    if level is None or level >= orig_width:
+        return key
+    base = thumbnail_base(key[0], key[1])
+    if base is None:
+        return key
+    filepath = thumbnail_file(base, level)
+    return (filepath, 0) if os.path.isfile(filepath) else key
+
+def thumbnail_jobs(context):
+    #only paths and frames here, the file checks run in the thumbnail process
+    jobs = []
+    seen = set()
+    fc = context.scene.frame_current
+    for seq in context.scene.sequence_editor.sequences_all:
+        if seq.type != 'TRANSFORM' or seq.input_1 is None or seq.input_1.type not in ['MOVIE','IMAGE']:
+            continue
+        seq_in = seq.input_1
+        if seq_in.name in seen:
+            continue
+        seen.add(seq_in.name)
+        
+        width = seq_in.elements[0].orig_width
+        height = seq_in.elements[0].orig_height
+        #sources no wider than the smallest level are shown at their own size
+        if width <= thumbnail_levels[0] or height == 0:
+            continue
+        
+        #only the used frames, nearest to the current frame first
+        first = seq_in.frame_offset_start
+        current = fc - seq.frame_start + first
+        indices = sorted(range(first, first + seq_in.frame_final_duration), key = lambda i: abs(i - current))[:thumbnail_max_frames]
+        if seq_in.type == 'MOVIE':
+            sources = [(seq_in.filepath, [i + 1 for i in indices])]
+        elif len(seq_in.elements) == 1:
+            sources = [(seq_in.directory + seq_in.elements[0].filename, [0])]
+        else:
+            sources = [(seq_in.directory + seq_in.elements[i].filename, [0]) for i in indices if i < len(seq_in.elements)]
+            
+        for filepath, frames in sources:
+            filepath = bpy.path.abspath(filepath)
+            #frames already sent to a worker this session
+            frames = [frame for frame in frames if (filepath, frame) not in thumbnail_worker['queued']]
+            if frames:
+                jobs.append({'path' : filepath, 'movie' : seq_in.type == 'MOVIE', 
+                             'width' : width, 'height' : height, 'frames' : frames})
+    return jobs
+
+def start_thumbnails(context):
+    process = thumbnail_worker['process']
+    if process is not None and process.poll() is None:
+        return
+    jobs = thumbnail_jobs(context)
+    if not jobs:
+        return
+    
+    thumbnail_worker['queued'].update((job['path'], frame) for job in jobs for frame in job['frames'])
+    
+    fd, job_path = tempfile.mkstemp(suffix = ".json")
+    with os.fdopen(fd, 'w') as job_file:
+        json.dump({'directory' : thumbnail_dir(), 'jobs' : jobs}, job_file)
+    
+    #the parent of the add-on package when installed as one
+    root = os.path.dirname(os.path.abspath(__file__))
+    for i in range(__name__.count(".")):
+        root = os.path.dirname(root)
+    expr = "import sys; sys.path.insert(0, %r); import %s; %s.build_thumbnails(%r)" % (
+        root, __name__, __name__, job_path)
+    thumbnail_worker['process'] = subprocess.Popen([bpy.app.binary_path, "-b", "--factory-startup", "--python-expr", expr],
+                                                    stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL)
+
+def build_thumbnails(job_path):
+    with open(job_path) as job_file:
+        data = json.load(job_file)
+    os.remove(job_path)
+    directory = data['directory']
+    
+    scene = bpy.context.scene
+    scene.render.resolution_percentage = 100
+    scene.render.use_sequencer = True
+    scene.render.use_file_extension = False
+    scene.render.image_settings.file_format = 'PNG'
+    sequences = scene.sequence_editor_create().sequences
+    
+    for job in data['jobs']:
+        levels = [level for level in thumbnail_levels if level < job['width']]
+        if not levels:
+            continue
+        items = []
+        for frame in job['frames']:
+            base = thumbnail_base(job['path'], frame)
+            if base is not None and not os.path.isfile(thumbnail_file(base, levels[0], directory)):
+                items.append((frame, base))
+        if not items:
+            continue
+        ratio = job['height'] / job['width']
+        scene.render.resolution_x = levels[-1]
+        scene.render.resolution_y = max(1, int(round(levels[-1] * ratio)))
+        
+        if job['movie']:
+            strip = sequences.new_movie("Source", job['path'], 1, 1)
+        else:
+            strip = sequences.new_image("Source", job['path'], 1, 1)
+        scene.frame_end = max(1, strip.frame_final_end - 1)
+        
+        for frame, base in items:
+            largest = thumbnail_file(base, levels[-1], directory)
+            scene.frame_set(max(frame, 1))
+            scene.render.filepath = largest
+            bpy.ops.render.render(write_still = True)
+            
+            img = bpy.data.images.load(largest)
+            for level in reversed(levels[:-1]):
+                img.scale(level, max(1, int(round(level * ratio))))
+                img.filepath_raw = thumbnail_file(base, level, directory)
+                img.file_format = 'PNG'
+                img.save()
+            bpy.data.images.remove(img)
+        
+        sequences.remove(strip)
+    
+    prune_thumbnails(directory)
+
+def prune_thumbnails(directory, limit = thumbnail_cache_size):
+    files = []
+    for name in os.listdir(directory):
+        filepath = os.path.join(directory, name)
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, filepath))
+    
+    #remove the oldest thumbnails first
+    total = sum(size for mtime, size, filepath in files)
+    for mtime, size, filepath in sorted(files):
+        if total <= limit:
+            break
+        try:
+            os.remove(filepath)
+        except OSError:
+            continue
+        total -= size
+
+######################################   Crop frame cache ########################################
+ring_size = 8
+prefetch_frames = 2
+read_size = 4*ring_size
+
+movie_read_size = 4*1024*1024
+
+#read-ahead only: warms the OS file cache, the image is still decoded on the main thread
+def read_media(filepath, frame, frames):
+    try:
+        size = os.path.getsize(filepath)
+        with open(filepath, 'rb') as media:
+            if frame == 0 or frames <= 0:
+                left = size
+            else:
+                #assume a roughly constant bitrate to find the bytes of the frame
+                frame_size = size // frames
+                media.seek(max(0, (frame - 1)*frame_size - movie_read_size//2))
+                left = frame_size + movie_read_size
+            while left > 0:
+                data = media.read(min(left, 1024*1024))
+                if not data:
+                    break
+                left -= len(data)
+    except OSError:
+        pass
+
+class TF_Frame_Ring():
+    def __init__(self, size = ring_size):
+        self.size = size
+        self.frames = OrderedDict()
+        self.pending = {}
+        self.read = OrderedDict()
+        self.previews = {}
+        self.worker_running = False
+        
+    def preview(self, key, width, orig_width):
+        #resolve thumbnail paths once per key and level, missing ones again once the worker is done
+        process = thumbnail_worker['process']
+        running = process is not None and process.poll() is None
+        if self.worker_running and not running:
+            self.previews.clear()
+        self.worker_running = running
+        memo = (key, thumbnail_level(width))
+        if memo not in self.previews:
+            self.previews[memo] = preview_key(key, width, orig_width)
+        return self.previews[memo]
+        
+    def is_ready(self, key, frames = 0):
+        if key in self.frames or key in self.read:
+            return True
+        thread = self.pending.get(key)
+        if thread is None:
+            thread = threading.Thread(target = read_media, args = (bpy.path.abspath(key[0]), key[1], frames))
+            thread.daemon = True
+            thread.start()
+            self.pending[key] = thread
+        if thread.is_alive():
+            return False
+        del self.pending[key]
+        self.read[key] = True
+        if len(self.read) > read_size:
+            self.read.popitem(last = False)
+        return True
+        
+    def get(self, key):
+        img = self.frames.pop(key, None)
+        if img is None:
+            #reuse the least recently shown datablock instead of creating one per frame
+            if len(self.frames) < self.size:
+                img = bpy.data.images.load(key[0])
+            else:
+                old_key, img = self.frames.popitem(last = False)
+                img.gl_free()
+                source = 'MOVIE' if key[1] != 0 else 'FILE'
+                if img.source != source:
+                    img.source = source
+                img.filepath = key[0]
+        self.frames[key] = img
+        return img
+    
+    def clear(self):
+        for img in self.frames.values():
+            img.user_clear()
+            bpy.data.images.remove(img)
+        self.frames.clear()
+        self.read.clear()
+        self.previews.clear()
+
+def crop_frame_key(seq, frame):
+    seq_in = seq.input_1
+    if seq_in.type == 'MOVIE':
+        return (seq_in.filepath, -seq.frame_start + seq_in.frame_offset_start + frame + 1)
+    
+    if len(seq_in.elements) == 1:
+        index = 0
+    else:                
+        index = frame - seq.frame_start + seq_in.frame_offset_start
+        if index < seq_in.frame_offset_start:
+            index = seq_in.frame_offset_start
+        if index > seq_in.frame_final_duration + seq_in.frame_offset_start - 1:
+            index = seq_in.frame_final_duration + seq_in.frame_offset_start - 1
+    return (seq_in.directory + seq_in.elements[index].filename, 0)
+
 #Global variable    
 vec_bl = Vector((0,0))
 vec_tr = Vector((0,0))
 origine = [10000,10000] 
 image_size = 200
-fframe = 0
 
 class TF_Crop(bpy.types.Operator):
     bl_idname = "sequencer.tf_crop"
@@ -949,43 +1440,20 @@ class TF_Crop(bpy.types.Operator):
                             ret = True
         return ret and context.space_data.type == 'SEQUENCE_EDITOR' and context.region.type == 'PREVIEW'
         
+    @restore_on_error
     def modal(self, context, event):
         context.area.tag_redraw()
         seq = context.scene.sequence_editor.active_strip 
         active_seq = context.scene.sequence_editor.active_strip.input_1
-        global image_size, fframe
+        global image_size
         self.pos_mouse = Vector((event.mouse_region_x,event.mouse_region_y))              
         
-        if self.enter_modal:
-            self.img.reload()
-            self.enter_modal = False
         #move fram       
-        if event.type in ['RIGHT_ARROW','LEFT_ARROW']:
-            if event.type == 'RIGHT_ARROW' and event.value == 'PRESS':
-                context.scene.frame_current +=1
-                fframe = fframe + 1
-            if event.type == 'LEFT_ARROW' and event.value == 'PRESS':
-                context.scene.frame_current -=1
-                fframe = fframe - 1
-            if seq.input_1.type == 'MOVIE' and event.value == 'RELEASE':
-                self.img.reload()            
-            if seq.input_1.type == 'IMAGE' and event.value == 'RELEASE':       
-                if len(seq.input_1.elements) == 1:
-                    index = 0
-                else:                
-                    index = context.scene.frame_current - seq.frame_start + seq.input_1.frame_offset_start 
-                    if index < seq.input_1.frame_offset_start:
-                        index = seq.input_1.frame_offset_start
-                    if index > seq.input_1.frame_final_duration + seq.input_1.frame_offset_start - 1:
-                        index = seq.input_1.frame_final_duration + seq.input_1.frame_offset_start - 1 
-                
-                self.img.user_clear()
-                bpy.data.images.remove(self.img)                
-                name = seq.input_1.elements[index].filename    
-                dir = seq.input_1.directory
-                fp = dir+name
-                self.img = bpy.data.images.load(fp)
-        ret = self.img.gl_load(fframe, bgl.GL_NEAREST, bgl.GL_NEAREST)                    
+        if event.type == 'RIGHT_ARROW' and event.value == 'PRESS':
+            context.scene.frame_current +=1
+        if event.type == 'LEFT_ARROW' and event.value == 'PRESS':
+            context.scene.frame_current -=1
+        self.show_frame(context, event.type == 'TIMER')
             
         #zoom image
         if event.type in ['WHEELDOWNMOUSE','WHEELUPMOUSE']:
@@ -1076,15 +1544,24 @@ class TF_Crop(bpy.types.Operator):
         #close                                
         if event.type == 'C' and event.value == 'PRESS':    
             bpy.types.SpaceSequenceEditor.draw_handler_remove(self._handle_crop, 'PREVIEW')                
-            if active_seq.type in ['MOVIE','IMAGE']:
-                self.img.user_clear()
-                bpy.data.images.remove(self.img)
+            context.window_manager.event_timer_remove(self._timer)
+            restore_preview()
+            invalidate_hit_index()
+            self.ring.clear()
        
             return {'FINISHED'}
          
         return {'RUNNING_MODAL'}   
                 
+    def cancel(self, context):
+        bpy.types.SpaceSequenceEditor.draw_handler_remove(self._handle_crop, 'PREVIEW')
+        context.window_manager.event_timer_remove(self._timer)
+        restore_preview()
+        invalidate_hit_index()
+        self.ring.clear()
+        
     def invoke(self, context, event): 
+        invalidate_hit_index()
         seq = context.scene.sequence_editor.active_strip
         if event.alt :
             seq.input_1.crop.min_x = seq.input_1.crop.min_y = 0
@@ -1092,31 +1569,17 @@ class TF_Crop(bpy.types.Operator):
             crop_scale(seq,max(seq.scale_start_x,seq.scale_start_y))
             ret = 'FINISHED'
         else:    
-            global origine, fframe
+            global origine
             if origine == [10000,10000]:
                 origine = context.region.view2d.view_to_region(0,0,clip=False)
-        
-            if seq.input_1.type == 'MOVIE':                
-                fp = seq.input_1.filepath
-                self.img = bpy.data.images.load(fp)
-                fframe = -seq.frame_start  + seq.input_1.frame_offset_start + context.scene.frame_current + 1 
-                self.enter_modal = True
-                
-            if seq.input_1.type == 'IMAGE':       
-                if len(seq.input_1.elements) == 1:
-                    index = 0
-                else:                
-                    index = context.scene.frame_current - seq.frame_start + seq.input_1.frame_offset_start
-                    if index < seq.input_1.frame_offset_start:
-                        index = seq.input_1.frame_offset_start
-                    if index > seq.input_1.frame_final_duration + seq.input_1.frame_offset_start - 1:
-                        index = seq.input_1.frame_final_duration + seq.input_1.frame_offset_start - 1
-                                
-                name = seq.input_1.elements[index].filename    
-                dir = seq.input_1.directory
-                fp = dir+name
-                self.img = bpy.data.images.load(fp)
-                self.enter_modal = False
+            
+            lower_preview(context)
+            start_thumbnails(context)
+            self.ring = TF_Frame_Ring()
+            self.frame_key = None
+            self.img = None
+            self.show_frame(context)
+            self._timer = context.window_manager.event_timer_add(0.05, context.window)
                 
             args = (self, context)
             self._handle_crop = bpy.types.SpaceSequenceEditor.draw_handler_add(draw_callback_px_crop, args, 'PREVIEW', 'POST_PIXEL')         
@@ -1124,6 +1587,38 @@ class TF_Crop(bpy.types.Operator):
             ret = 'RUNNING_MODAL'
             
         return {ret}
+    
+    def show_frame(self, context, prefetch = False):
+        seq = context.scene.sequence_editor.active_strip
+        start = seq.frame_final_start
+        end = seq.frame_final_end - 1
+        fc = min(max(context.scene.frame_current, start), end)
+        frames = seq.input_1.frame_duration if seq.input_1.type == 'MOVIE' else 0
+        key = crop_frame_key(seq, fc)
+        width = 2*image_size
+        orig_width = seq.input_1.elements[0].orig_width
+        
+        if (key, thumbnail_level(width)) != self.frame_key:
+            preview = self.ring.preview(key, width, orig_width)
+            if self.ring.is_ready(preview, frames):
+                self.frame_key = (key, thumbnail_level(width))
+                self.preview = preview
+                self.img = self.ring.get(preview)
+                self.img.gl_load(preview[1], bgl.GL_NEAREST, bgl.GL_NEAREST)
+        if self.img is not None:
+            self.img = self.ring.get(self.preview)
+        
+        #load at most one neighbour frame per timer tick
+        if not prefetch:
+            return
+        for i in range(1, prefetch_frames + 1):
+            for frame in [fc + i, fc - i]:
+                if frame < start or frame > end:
+                    continue
+                near_key = self.ring.preview(crop_frame_key(seq, frame), width, orig_width)
+                if near_key not in self.ring.frames and self.ring.is_ready(near_key, frames):
+                    self.ring.get(near_key).gl_load(near_key[1], bgl.GL_NEAREST, bgl.GL_NEAREST)
+                    return
           
 ######################################   Selection draw Function ########################################
 def rotate_point(p, angle):
@@ -1157,6 +1652,112 @@ def make_quad(seq):
     
     return [p0,p1,p2,p3]
 
+quad_corners = ((-1, -1), (-1, 1), (1, 1), (1, -1))
+
+def make_quads(seqs):
+    if numpy is None or not seqs:
+        return [make_quad(seq) for seq in seqs]
+    
+    p = get_fac()
+    res_x = bpy.context.scene.render.resolution_x
+    res_y = bpy.context.scene.render.resolution_y
+    
+    params = numpy.array([(seq.translate_start_x, seq.translate_start_y, seq.translation_unit == 'PERCENT', 
+                           seq.scale_start_x, seq.scale_start_y, seq.use_uniform_scale, seq.rotation_start, 
+                           seq.use_flip_x, seq.use_flip_y) for seq in seqs], dtype=float)
+    percent = params[:, 2] != 0
+    vt_x = numpy.where(percent, params[:, 0] * res_x/100, params[:, 0]) * p
+    vt_y = numpy.where(percent, params[:, 1] * res_y/100, params[:, 1]) * p
+    sc_x = res_x * p/2 * params[:, 3]
+    sc_y = numpy.where(params[:, 5] != 0, sc_x, res_y * p/2 * params[:, 4])
+    rot = numpy.radians(params[:, 6])
+    s = numpy.sin(rot)[:, None]
+    c = numpy.cos(rot)[:, None]
+    
+    corners = numpy.array(quad_corners, dtype=float)
+    cx = corners[None, :, 0] * sc_x[:, None]
+    cy = corners[None, :, 1] * sc_y[:, None]
+    
+    quads = numpy.empty((len(seqs), 4, 2))
+    quads[:, :, 0] = vt_x[:, None] + cx * c - cy * s
+    quads[:, :, 1] = vt_y[:, None] + cx * s + cy * c
+    quads[:, :, 0] *= numpy.where(params[:, 7] != 0, -1, 1)[:, None]
+    quads[:, :, 1] *= numpy.where(params[:, 8] != 0, -1, 1)[:, None]
+    return quads
+
+######################################   Hit test index ########################################
+grid_size = 16
+hit_index = {'key' : None, 'layers' : [], 'grid' : {}}
+
+@persistent
+def invalidate_hit_index(*args):
+    hit_index['key'] = None
+
+@persistent
+def update_hit_index(scene):
+    if scene.is_updated or bpy.data.scenes.is_updated:
+        hit_index['key'] = None
+
+def get_hit_index(context):
+    scene = context.scene
+    fc = scene.frame_current
+    sequences = scene.sequence_editor.sequences
+    #transform edits reset the key through invalidate_hit_index and update_hit_index
+    key = (scene.name, fc, len(sequences), get_fac(), scene.render.resolution_x, scene.render.resolution_y)
+    if hit_index['key'] == key:
+        return hit_index
+    
+    seqs = [seq for seq in reversed(sequences) if seq.type == 'TRANSFORM' and 
+            seq.frame_start <= fc and (seq.frame_start + seq.frame_final_duration) >= fc]
+    
+    layers = [(seq.name, quad) for seq, quad in zip(seqs, make_quads(seqs))]
+    
+    grid = {}
+    if layers:
+        bounds = [(min(v[0] for v in quad), min(v[1] for v in quad), max(v[0] for v in quad), max(v[1] for v in quad)) for name, quad in layers]
+        min_x = min(b[0] for b in bounds)
+        min_y = min(b[1] for b in bounds)
+        cell_x = (max(b[2] for b in bounds) - min_x) / grid_size or 1
+        cell_y = (max(b[3] for b in bounds) - min_y) / grid_size or 1
+        for i, b in enumerate(bounds):
+            x0 = int((b[0] - min_x) / cell_x)
+            x1 = min(int((b[2] - min_x) / cell_x), grid_size - 1)
+            y0 = int((b[1] - min_y) / cell_y)
+            y1 = min(int((b[3] - min_y) / cell_y), grid_size - 1)
+            for gx in range(x0, x1 + 1):
+                for gy in range(y0, y1 + 1):
+                    grid.setdefault((gx, gy), []).append(i)
+        hit_index['origin'] = Vector((min_x, min_y))
+        hit_index['cell'] = Vector((cell_x, cell_y))
+    
+    hit_index['layers'] = layers
+    hit_index['grid'] = grid
+    hit_index['key'] = key
+    return hit_index
+
+def hit_test(context, po):
+    index = get_hit_index(context)
+    if not index['layers']:
+        return []
+    gx = floor((po.x - index['origin'].x) / index['cell'].x)
+    gy = floor((po.y - index['origin'].y) / index['cell'].y)
+    
+    sequences = context.scene.sequence_editor.sequences
+    hits = []
+    for i in index['grid'].get((min(gx, grid_size - 1), min(gy, grid_size - 1)), []):
+        name, quad = index['layers'][i]
+        seq = sequences.get(name)
+        if seq is None:
+            invalidate_hit_index()
+            return hit_test(context, po)
+        if not seq.mute and geometry.intersect_point_quad_2d(po, quad[0], quad[1], quad[2], quad[3]):
+            hits.append(seq)
+    return hits
+
+def visible_layers(context):
+    sequences = context.scene.sequence_editor.sequences
+    return [sequences[name] for name, quad in get_hit_index(context)['layers'] if name in sequences]
+
 def draw_callback_px_select(self, context):
     bgl.glEnable(bgl.GL_BLEND)
     col_act = context.user_preferences.themes['Default'].view_3d.object_active
@@ -1172,7 +1773,7 @@ def draw_callback_px_select(self, context):
                 
             bgl.glBegin(bgl.GL_LINE_LOOP)
             for vec in quad:
-                pos = context.region.view2d.view_to_region(vec.x,vec.y, clip=False)
+                pos = context.region.view2d.view_to_region(vec[0],vec[1], clip=False)
                 bgl.glVertex2i(pos[0], pos[1])   
             bgl.glEnd()
             
@@ -1211,11 +1812,8 @@ class TF_Draw_Selection(bpy.types.Operator):
         self._timer = context.window_manager.event_timer_add(0.01, context.window)          
         context.window_manager.modal_handler_add(self)
 
-        self.quad_list=[]
-                
-        for seq in reversed(context.scene.sequence_editor.sequences):
-            if seq.type == 'TRANSFORM':           
-                self.quad_list.append([seq,make_quad(seq)])
+        seqs = [seq for seq in reversed(context.scene.sequence_editor.sequences) if seq.type == 'TRANSFORM']
+        self.quad_list = list(zip(seqs, make_quads(seqs)))
                 
         return {'RUNNING_MODAL'}
         
@@ -1237,36 +1835,26 @@ class TF_Select(bpy.types.Operator):
         po = Vector((pos[0],pos[1]))
         list_sel = []
         
-        fc = context.scene.frame_current
-        for seq in reversed(context.scene.sequence_editor.sequences):
-            if seq.type == 'TRANSFORM' and not seq.mute:          
-                p0,p1,p2,p3 = make_quad(seq)                     
-                if not event.type == 'A':
-                    if geometry.intersect_point_quad_2d(po, p0, p1, p2, p3) and seq.frame_start <= fc and (seq.frame_start + seq.frame_final_duration) >= fc:
-                        list_sel.append(seq)
-                        if not event.shift :
-                            bpy.ops.sequencer.select_all(action='DESELECT')
-                            seq.select = True
-                            bpy.context.scene.sequence_editor.active_strip = seq
-                            break
-                        else :
-                            if not seq.select:
-                                seq.select = True
-                                bpy.context.scene.sequence_editor.active_strip = seq
-                                break
-                            else:
-                                seq.select = False
-                                break
+        if not event.type == 'A':
+            list_sel = hit_test(context, po)[:1]
+            for seq in list_sel:
+                if not event.shift :
+                    bpy.ops.sequencer.select_all(action='DESELECT')
+                    seq.select = True
+                    bpy.context.scene.sequence_editor.active_strip = seq
+                else :
+                    if not seq.select:
+                        seq.select = True
+                        bpy.context.scene.sequence_editor.active_strip = seq
+                    else:
+                        seq.select = False
         if not list_sel and not event.shift and not event.type == 'A':
             bpy.ops.sequencer.select_all(action='DESELECT')
             
         if event.type == 'A':
-            temp_sel = False
-            for seq in reversed(context.scene.sequence_editor.sequences):
-                if seq.select:
-                    temp_sel = True     
-                if seq.type == 'TRANSFORM' and seq.frame_start <= fc and (seq.frame_start + seq.frame_final_duration) >= fc:
-                    seq.select = True
+            temp_sel = any(seq.select for seq in context.scene.sequence_editor.sequences)
+            for seq in visible_layers(context):
+                seq.select = True
             if temp_sel == True:
                 bpy.ops.sequencer.select_all(action='DESELECT')       
             
@@ -1357,41 +1945,45 @@ class TF_Call_Menu_Layers(bpy.types.Operator):
         return ret and context.space_data.type == 'SEQUENCE_EDITOR' and context.region.type == 'PREVIEW'
                 
     def invoke(self, context,event):   
-        global multi
-        global po
-                
         pos = context.region.view2d.region_to_view(event.mouse_region_x,event.mouse_region_y)
         po = Vector((pos[0],pos[1]))
         
-        multi = True if event.shift else False 
+        #drop entries of closed areas, their pointers can be reused
+        areas = set(area.as_pointer() for window in context.window_manager.windows for area in window.screen.areas)
+        for key in [key for key in menu_layers if key not in areas]:
+            del menu_layers[key]
+        menu_layers[context.area.as_pointer()] = {'layers' : [(seq.name, seq.input_1.name) for seq in hit_test(context, po)], 
+                                                  'multi' : True if event.shift else False}
            
         bpy.ops.wm.call_menu(name="VSE_MT_Menu_Layers")
         return {'FINISHED'}
 
-multi = False
-po = Vector((0,0))
+#layer menu entries of each preview area
+menu_layers = {}
+
+@persistent
+def clear_menu_layers(*args):
+    menu_layers.clear()
 
 class TF_Menu_Layers(bpy.types.Menu):
     bl_label = "Select layer menu :"
     bl_idname = "VSE_MT_Menu_Layers"
 
-    global po
     def draw(self, context):
         layout = self.layout
         
-        fc = context.scene.frame_current
-        
-        for seq in reversed(context.scene.sequence_editor.sequences):
-            if seq.type == 'TRANSFORM' and not seq.mute:          
-                p0,p1,p2,p3 = make_quad(seq)
-                if geometry.intersect_point_quad_2d(po, p0, p1, p2, p3) and seq.frame_start <= fc and (seq.frame_start + seq.frame_final_duration) >= fc: 
-                    layout.operator("sequencer.select_layers",  text=seq.input_1.name, icon='SEQUENCE' ).name = seq.name
+        entries = menu_layers.get(context.area.as_pointer() if context.area else None, {'layers' : [], 'multi' : False})
+        for name, label in entries['layers']:
+            op = layout.operator("sequencer.select_layers",  text=label, icon='SEQUENCE' )
+            op.name = name
+            op.multi = entries['multi']
 
 class TF_Select_Layers(bpy.types.Operator):
     bl_label = "Select Layers"
     bl_idname = "sequencer.select_layers"
 
     name = StringProperty()
+    multi = BoolProperty()
     
     @classmethod
     def poll(cls, context):
@@ -1402,13 +1994,15 @@ class TF_Select_Layers(bpy.types.Operator):
                 
     def execute(self, context):
         seq = context.scene.sequence_editor.sequences[self.name]
-        if not multi :
+        if not self.multi :
             bpy.ops.sequencer.select_all(action='DESELECT')
             seq.select = True
         else :
             seq.select = False if seq.select else True
             
         bpy.context.scene.sequence_editor.active_strip = context.scene.sequence_editor.sequences[self.name]
+        if context.area:
+            menu_layers.pop(context.area.as_pointer(), None)
         bpy.ops.sequencer.tf_draw_selection('INVOKE_DEFAULT') 
         return {'FINISHED'}
 ##########################  Draw 2d cursor ###################################
@@ -1479,6 +2073,9 @@ def Add_Icon_Pivot_Point(self, context):
     seq = context.scene
     layout = self.layout
     layout.prop(context.scene, "seq_pivot_type", text='', expand=False,  icon_only=True)
+    layout.prop(context.scene, "tf_preview_quality", text='', expand=False,  icon_only=True)
+    if context.scene.tf_preview_quality == 'PROXY':
+        layout.prop(context.scene, "tf_preview_proxy", text='')
         
 
 ##########################  Register    ###################################
@@ -1500,6 +2097,8 @@ def update_pivot_point(self,context):
             _handle_2d_cursor = None   
     
 item_pivot_point = (('0','Median Point','', 'ROTATECENTER', 0),('1','Individual Origins','', 'ROTATECOLLECTION', 1),('2','2D Cursor','', 'CURSOR', 2),('3','Active Strip','', 'ROTACTIVE', 3))  
+item_preview_quality = (('OFF','Full Preview','Keep the preview size while transforming', 'IMAGE_COL', 0),('PROXY','Proxy Preview','Show a proxy size while transforming', 'SEQ_PREVIEW', 1))
+item_preview_proxy = (('25','25%','', 0),('50','50%','', 1),('75','75%','', 2))
         
 def register():
     bpy.utils.register_module(__name__)
@@ -1510,6 +2109,8 @@ def register():
                                           step=1,
                                           update = update_seq_cursor2d_loc)
     bpy.types.Scene.seq_pivot_type = bpy.props.EnumProperty(name="Pivot Point",default = "1", items=item_pivot_point,update = update_pivot_point)
+    bpy.types.Scene.tf_preview_quality = bpy.props.EnumProperty(name="Preview Quality",default = "OFF", items=item_preview_quality)
+    bpy.types.Scene.tf_preview_proxy = bpy.props.EnumProperty(name="Preview Proxy",default = "50", items=item_preview_proxy)
     bpy.types.SEQUENCER_HT_header.append(Add_Icon_Pivot_Point)
         
     km = bpy.context.window_manager.keyconfigs.default.keymaps['View2D']
@@ -1534,8 +2135,24 @@ def register():
     kmi = km.keymap_items.new("sequencer.tf_call_menu_layers", mb + 'MOUSE', 'PRESS', shift=True, alt=True)
     kmi = km.keymap_items.new("sequencer.tf_set_cursor2d", mb + 'MOUSE', 'PRESS', ctrl=True)
     
+    bpy.app.handlers.load_post.append(invalidate_hit_index)
+    bpy.app.handlers.undo_post.append(invalidate_hit_index)
+    bpy.app.handlers.redo_post.append(invalidate_hit_index)
+    bpy.app.handlers.scene_update_post.append(update_hit_index)
+    bpy.app.handlers.save_pre.append(restore_preview)
+    bpy.app.handlers.load_pre.append(restore_preview)
+    bpy.app.handlers.load_pre.append(clear_menu_layers)
+    
 def unregister():
     bpy.utils.unregister_module(__name__)
+    
+    bpy.app.handlers.load_post.remove(invalidate_hit_index)
+    bpy.app.handlers.undo_post.remove(invalidate_hit_index)
+    bpy.app.handlers.redo_post.remove(invalidate_hit_index)
+    bpy.app.handlers.scene_update_post.remove(update_hit_index)
+    bpy.app.handlers.save_pre.remove(restore_preview)
+    bpy.app.handlers.load_pre.remove(restore_preview)
+    bpy.app.handlers.load_pre.remove(clear_menu_layers)
     bpy.types.SEQUENCER_HT_header.remove(Add_Icon_Pivot_Point)
     
     km = bpy.context.window_manager.keyconfigs.default.keymaps['View2D']